@@ -0,0 +1,111 @@
+"""
+Lightweight stand-ins for the discord.py objects the cogs touch.
+
+Only the attributes and coroutines the bot actually uses are provided. REST
+calls are recorded instead of sent, optionally after a simulated latency.
+"""
+import asyncio
+import itertools
+
+import discord
+
+_ids = itertools.count(10_000)
+
+class FakeAsset:
+    def __init__(self, url):
+        self.url = url
+
+class FakeUser:
+    def __init__(self, user_id, name=None):
+        self.id = user_id
+        self.name = name or f"user{user_id}"
+        self.display_name = self.name
+        self.display_avatar = FakeAsset(f"https://cdn.example/avatars/{user_id}.png")
+        self.guild_permissions = discord.Permissions.all()
+
+class FakeGuild:
+    def __init__(self, guild_id):
+        self.id = guild_id
+        self.name = f"guild{guild_id}"
+
+class FakeChannel:
+    def __init__(self, channel_id):
+        self.id = channel_id
+        self.mention = f"<#{channel_id}>"
+
+class Recorder:
+    """
+    Collects the REST calls made by one interaction.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = []
+
+    async def call(self, name, kwargs):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.calls.append((name, kwargs))
+
+class FakeMessage:
+    def __init__(self, channel, recorder):
+        self.id = next(_ids)
+        self.channel = channel
+        self._recorder = recorder
+
+    async def edit(self, **kwargs):
+        await self._recorder.call("message.edit", kwargs)
+
+    async def delete(self):
+        await self._recorder.call("message.delete", {})
+
+class FakeResponse:
+    def __init__(self, recorder):
+        self._recorder = recorder
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    async def _respond(self, name, kwargs):
+        if self._done:
+            raise discord.InteractionResponded(None)
+        self._done = True
+        await self._recorder.call(name, kwargs)
+
+    async def send_message(self, content=None, **kwargs):
+        await self._respond("response.send_message", dict(kwargs, content=content))
+
+    async def edit_message(self, **kwargs):
+        await self._respond("response.edit_message", kwargs)
+
+    async def defer(self, **kwargs):
+        await self._respond("response.defer", kwargs)
+
+class FakeFollowup:
+    def __init__(self, recorder):
+        self._recorder = recorder
+
+    async def send(self, content=None, **kwargs):
+        await self._recorder.call("followup.send", dict(kwargs, content=content))
+
+class FakeInteraction:
+    """
+    A component or slash-command interaction. `message` is the message the
+    clicked component is on (None for slash commands).
+    """
+
+    def __init__(self, user, channel, guild=None, message=None, latency=0.0):
+        self.recorder = Recorder(latency)
+        self.user = user
+        self.channel = channel
+        self.guild = guild
+        self.guild_id = guild.id if guild else None
+        self.message = message
+        self.created_at = discord.utils.utcnow()
+        self.response = FakeResponse(self.recorder)
+        self.followup = FakeFollowup(self.recorder)
+
+    @property
+    def calls(self):
+        return self.recorder.calls
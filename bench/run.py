@@ -0,0 +1,309 @@
+"""
+Offline benchmarks for the game and suggestion hot paths.
+
+Drives the real cog code with the stand-ins from bench.fakes: no token, no
+network. Everything runs in a scratch directory, so the bot's own
+questions.json and data/ are never touched.
+
+    python -m bench.run
+    python -m bench.run --questions 1000,100000,1000000 --guilds 500 \\
+        --ratings pg=0.6,pg13=0.3,r=0.1 --output bench.json
+
+Results are printed as JSON (and written to --output), one entry per
+(scenario, pool size) with p50/p99 latency in milliseconds and throughput.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = ["start_game", "interaction_check", "handle_click", "check_duplicates", "approve", "deny", "bulk_review"]
+
+GAME_MODES = ["truth", "dare", "tod", "wyr", "nhie", "paranoia", "random"]
+
+def parse_ratings(spec):
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip().lower()] = float(weight or 1)
+    return mix
+
+def make_vocabulary(rng, size=2000):
+    syllables = ["ti", "ck", "le", "fe", "ath", "er", "gi", "ggle", "sq", "ui", "rm", "la", "ugh", "toe", "arm", "pit"]
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(syllables) for _ in range(rng.randint(1, 3))))
+    return sorted(words)
+
+def make_questions(rng, total, rating_mix, vocabulary):
+    """
+    Returns questions.json-style data with `total` questions spread over
+    every category, ratings drawn from `rating_mix`.
+    """
+    from utils.question_loader import CATEGORIES, TEXT_KEYS
+
+    ratings = list(rating_mix)
+    weights = [rating_mix[r] for r in ratings]
+    data = {category: [] for category in CATEGORIES}
+    for i in range(total):
+        category = CATEGORIES[i % len(CATEGORIES)]
+        text = " ".join(rng.choice(vocabulary) for _ in range(rng.randint(6, 16)))
+        data[category].append({
+            "id": f"{i:07x}",
+            TEXT_KEYS[category]: text.capitalize() + "?",
+            "rating": rng.choices(ratings, weights)[0],
+        })
+    return data
+
+def summarize(scenario, samples, elapsed, **extra):
+    samples = sorted(samples)
+    n = len(samples)
+
+    def percentile(q):
+        return samples[min(n - 1, int(q * n))] * 1000 if n else None
+
+    return dict(
+        scenario=scenario,
+        count=n,
+        p50_ms=percentile(0.50),
+        p99_ms=percentile(0.99),
+        max_ms=samples[-1] * 1000 if n else None,
+        throughput_per_s=n / elapsed if elapsed else None,
+        **extra
+    )
+
+async def timed(iterations, make_call, warmup=10):
+    """
+    Runs make_call() -> awaitable `iterations` times after a short warmup.
+
+    Returns:
+        tuple: (list of per-call seconds, total elapsed seconds)
+    """
+    for _ in range(min(warmup, iterations)):
+        await make_call()
+    samples = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        await make_call()
+        samples.append(time.perf_counter() - t0)
+    return samples, time.perf_counter() - started
+
+class Bench:
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.latency = args.latency_ms / 1000
+        self.vocabulary = make_vocabulary(self.rng)
+        self.guilds = []
+        self.reviewer = None
+
+    async def setup_guilds(self):
+        from utils.server_config import save_config
+        from bench.fakes import FakeGuild, FakeChannel, FakeUser
+
+        config = {}
+        for g in range(1, self.args.guilds + 1):
+            guild = FakeGuild(g)
+            main, nsfw = FakeChannel(g * 10 + 1), FakeChannel(g * 10 + 2)
+            config[str(g)] = {"main": main.id, "nsfw": nsfw.id}
+            self.guilds.append((guild, [main, nsfw]))
+        await save_config(config)
+        self.users = [FakeUser(100_000 + i) for i in range(max(1000, self.args.guilds * 10))]
+        self.reviewer = FakeUser(1)
+
+    def interaction(self, with_message=False):
+        from bench.fakes import FakeInteraction, FakeMessage
+
+        guild, channels = self.rng.choice(self.guilds)
+        channel = self.rng.choice(channels)
+        interaction = FakeInteraction(self.rng.choice(self.users), channel, guild, latency=self.latency)
+        if with_message:
+            interaction.message = FakeMessage(channel, interaction.recorder)
+        return interaction
+
+    def rating_choice(self):
+        from discord import app_commands
+
+        # Most games are started without a rating
+        if self.rng.random() < 0.7:
+            return None
+        value = self.rng.choice(["pg", "pg13"])
+        return app_commands.Choice(name=value.upper(), value=value)
+
+    async def load_pool(self, size):
+        from utils.question_loader import QUESTIONS_FILE, PACK_FILE, QUESTIONS_DELTA_FILE, reload_store
+        from utils.question_pack import compile_pack
+        from utils.storage import write_json_sync
+
+        data = make_questions(self.rng, size, parse_ratings(self.args.ratings), self.vocabulary)
+        self.sample_texts = [q.get("question") or q.get("dare") for q in self.rng.sample(data["truths"], min(200, len(data["truths"])))]
+        write_json_sync(QUESTIONS_FILE, data)
+        if self.args.pack:
+            compile_pack(data, PACK_FILE)
+        elif os.path.exists(PACK_FILE):
+            os.remove(PACK_FILE)
+        # Approvals from the previous pool size must not be replayed onto this one
+        if os.path.exists(QUESTIONS_DELTA_FILE):
+            os.remove(QUESTIONS_DELTA_FILE)
+        store = await reload_store()
+        return store.build_seconds
+
+    async def run_scenario(self, name, size):
+        from cogs.game_commands import GameCommands, GameButton
+        from cogs.suggest_commands import check_duplicates, ConfirmApproveView, ConfirmDenyView, BulkReviewView
+        from utils.suggestion_manager import add_suggestion
+        from utils.review_queue import review_queue, REVIEW_PAGE_SIZE
+        from utils.similarity_index import get_similarity_index
+
+        iterations = self.args.iterations
+        extra = {}
+
+        if name == "start_game":
+            cog = GameCommands(bot=None)
+
+            async def call():
+                await cog.start_game(self.interaction(), self.rng.choice(GAME_MODES), self.rating_choice())
+
+        elif name in ("interaction_check", "handle_click"):
+            async def call():
+                mode = self.rng.choice(["tod", "wyr", "nhie", "paranoia", "random"])
+                choice = self.rng.choice(["truth", "dare", "random"]) if mode == "tod" else mode
+                button = GameButton(mode, choice, self.rng.choice([None, "pg", "pg13"]))
+                interaction = self.interaction(with_message=True)
+                if name == "interaction_check":
+                    await button.interaction_check(interaction)
+                else:
+                    await button.handle_click(interaction, choice)
+
+        elif name == "check_duplicates":
+            started = time.perf_counter()
+            await get_similarity_index()
+            extra["index_build_ms"] = (time.perf_counter() - started) * 1000
+
+            async def call():
+                text = self.rng.choice(self.sample_texts)
+                # Half repeats of existing questions, half new text
+                if self.rng.random() < 0.5:
+                    text = " ".join(self.rng.choice(self.vocabulary) for _ in range(10))
+                await check_duplicates(text, "truth")
+
+        else:
+            iterations = self.args.review_iterations
+            # A bulk commit resolves a full page of suggestions
+            per_call = REVIEW_PAGE_SIZE if name == "bulk_review" else 1
+            for _ in range((iterations + 10) * per_call):
+                await add_suggestion(
+                    " ".join(self.rng.choice(self.vocabulary) for _ in range(10)),
+                    "truth", "pg", self.reviewer.id, self.reviewer.name
+                )
+
+            async def call():
+                interaction = self.interaction(with_message=True)
+                interaction.user = self.reviewer
+                if name == "bulk_review":
+                    view = BulkReviewView(self.reviewer.id)
+                    await view.render()
+                    for i, sg in enumerate(view.shown.values()):
+                        status = "denied" if i % 3 == 0 else "approved"
+                        view.decisions[sg['id']] = {"id": sg['id'], "status": status, "rating": "pg"}
+                    await view.commit.callback(interaction)
+                    return
+                sg = (await review_queue.pending())[0]
+                if name == "approve":
+                    view = ConfirmApproveView(sg['id'], self.reviewer.id, "pg")
+                else:
+                    view = ConfirmDenyView(sg['id'], self.reviewer.id)
+                await view.confirm.callback(interaction)
+
+        samples, elapsed = await timed(iterations, call)
+        return summarize(name, samples, elapsed, questions=size, guilds=self.args.guilds, **extra)
+
+    async def run(self):
+        from utils.storage import flusher
+        from utils.message_edits import message_edits
+
+        await self.setup_guilds()
+        results = []
+        for size in self.args.questions:
+            build_seconds = await self.load_pool(size)
+            print(f"{size} questions loaded in {build_seconds * 1000:.1f} ms", file=sys.stderr)
+            for name in self.args.scenarios:
+                result = await self.run_scenario(name, size)
+                result["store_build_ms"] = build_seconds * 1000
+                results.append(result)
+                print(f"  {name}: p50 {result['p50_ms']:.3f} ms, p99 {result['p99_ms']:.3f} ms, "
+                      f"{result['throughput_per_s']:.0f}/s", file=sys.stderr)
+            await flusher.flush_all()
+        await message_edits.drain()
+        return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the bot's hot paths offline.")
+    parser.add_argument("--questions", default="1000,10000,100000",
+                        help="comma-separated pool sizes (total questions)")
+    parser.add_argument("--guilds", type=int, default=100)
+    parser.add_argument("--ratings", default="pg=0.5,pg13=0.3,r=0.2",
+                        help="rating mix as name=weight pairs")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--review-iterations", type=int, default=100,
+                        help="iterations for approve/deny, which write to disk")
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="simulated REST latency for responses and edits")
+    parser.add_argument("--pack", action="store_true", help="load pools from a compiled pack")
+    parser.add_argument("--real-limits", action="store_true",
+                        help="keep the production rate limits (most clicks will be rejected)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="also write the JSON report here")
+    args = parser.parse_args()
+    args.questions = [int(n) for n in args.questions.split(",")]
+    args.scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+
+    output = os.path.abspath(args.output) if args.output else None
+    sys.path.insert(0, ROOT)
+    workdir = tempfile.mkdtemp(prefix="tickle-bench-")
+    os.chdir(workdir)
+    os.makedirs("data")
+
+    if not args.real_limits:
+        # One shared limiter serves every fake user; lift it so each call does full work
+        from utils.rate_limiter import RateLimit, rate_limiter
+        unlimited = RateLimit(10 ** 9, 1.0)
+        for _, table in rate_limiter.scopes:
+            table.limit = unlimited
+
+    results = asyncio.run(Bench(args).run())
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "config": {
+            "questions": args.questions,
+            "guilds": args.guilds,
+            "ratings": parse_ratings(args.ratings),
+            "iterations": args.iterations,
+            "review_iterations": args.review_iterations,
+            "latency_ms": args.latency_ms,
+            "pack": args.pack,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Runs TickleBot as several worker processes, each with its own event loop and
+its own range of shards, so the bot can use more than one core.
+
+    python cluster.py --processes 4              # shard count recommended by Discord
+    python cluster.py --processes 4 --shards 16
+
+Workers share state through SQLite (TICKLE_STORAGE=sqlite is forced for
+them), so import the JSON data once first:
+
+    python -m utils.sqlite_backend import
+
+Every worker reports per-shard health to the launcher, which prints a summary,
+writes it to data/cluster_health.json and restarts workers that exit.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import queue
+import time
+
+from utils.cluster import shard_ranges, HEALTH_INTERVAL
+
+HEALTH_FILE = 'data/cluster_health.json'
+
+# Seconds to wait before restarting a worker that exited
+RESTART_DELAY = 5.0
+
+def configure_worker(metrics_port):
+    """
+    Prepares a freshly spawned worker before the bot modules load.
+
+    utils.metrics is already imported by then (through utils.cluster), so
+    the metrics port is set on the server itself rather than through
+    TICKLE_METRICS_PORT.
+    """
+    os.environ["TICKLE_STORAGE"] = "sqlite"
+    from utils.metrics import metrics_server
+    # Always set so workers never inherit (and fight over) the launcher's port
+    metrics_server.port = metrics_port
+
+def run_worker(cluster_id, shard_ids, shard_count, health_queue, force_sync, metrics_port):
+    # Runs in a fresh (spawned) interpreter
+    configure_worker(metrics_port)
+
+    import main
+    bot = main.TickleBot(
+        force_sync=force_sync,
+        shard_ids=shard_ids,
+        shard_count=shard_count,
+        cluster_id=cluster_id,
+        health_queue=health_queue
+    )
+    bot.run(main.TOKEN)
+
+async def fetch_recommended_shards(token):
+    import aiohttp
+    async with aiohttp.ClientSession() as session:
+        async with session.get(
+            "https://discord.com/api/v10/gateway/bot",
+            headers={"Authorization": f"Bot {token}"}
+        ) as resp:
+            resp.raise_for_status()
+            return (await resp.json())["shards"]
+
+def format_health(report, now):
+    if report is None:
+        return "no report yet"
+    age = now - report["time"]
+    shards = " ".join(
+        f"{shard_id}:{'up' if s['connected'] else 'DOWN'}"
+        + (f"({s['latency_ms']:.0f}ms,{s['guilds']}g)" if s["latency_ms"] is not None else f"({s['guilds']}g)")
+        for shard_id, s in sorted(report["shards"].items(), key=lambda item: int(item[0]))
+    )
+    state = "ready" if report["ready"] else "starting"
+    stale = f" STALE {age:.0f}s" if age > 3 * HEALTH_INTERVAL else ""
+    return f"pid {report['pid']} {state}{stale}, {report['guilds']} guilds, loop lag {report['loop_lag_ms']}ms | {shards}"
+
+class Launcher:
+    def __init__(self, ranges, shard_count, force_sync=False, metrics_port=0):
+        self.ranges = ranges
+        self.shard_count = shard_count
+        self.force_sync = force_sync
+        self.metrics_port = metrics_port
+        self.ctx = multiprocessing.get_context("spawn")
+        self.health_queue = self.ctx.Queue()
+        # cluster id -> Process
+        self.processes = {}
+        # cluster id -> latest health report
+        self.health = {}
+        self.restarts = {}
+
+    def spawn(self, cluster_id):
+        port = self.metrics_port + cluster_id if self.metrics_port else 0
+        process = self.ctx.Process(
+            target=run_worker,
+            args=(cluster_id, self.ranges[cluster_id], self.shard_count, self.health_queue,
+                  self.force_sync and cluster_id == 0, port),
+            name=f"tickle-cluster-{cluster_id}",
+        )
+        process.start()
+        self.processes[cluster_id] = process
+        print(f"Started cluster {cluster_id} (pid {process.pid}) with shards {self.ranges[cluster_id]}")
+
+    def drain_reports(self):
+        while True:
+            try:
+                report = self.health_queue.get_nowait()
+            except queue.Empty:
+                return
+            self.health[report["cluster"]] = report
+
+    def report(self):
+        from utils.storage import write_json_sync
+
+        now = time.time()
+        lines = [f"Cluster health ({len(self.processes)} processes, {self.shard_count} shards):"]
+        summary = {}
+        for cluster_id, process in sorted(self.processes.items()):
+            report = self.health.get(cluster_id)
+            alive = process.is_alive()
+            lines.append(f"  [{cluster_id}] {'alive' if alive else 'DEAD'} {format_health(report, now)}")
+            summary[str(cluster_id)] = {
+                "alive": alive,
+                "restarts": self.restarts.get(cluster_id, 0),
+                "shard_ids": self.ranges[cluster_id],
+                "report": report,
+            }
+        print("\n".join(lines))
+        write_json_sync(HEALTH_FILE, {"time": now, "shard_count": self.shard_count, "clusters": summary}, indent=2)
+
+    def run(self):
+        for cluster_id in range(len(self.ranges)):
+            self.spawn(cluster_id)
+
+        next_report = time.monotonic() + HEALTH_INTERVAL
+        dead_since = {}
+        try:
+            while True:
+                time.sleep(1.0)
+                self.drain_reports()
+
+                for cluster_id, process in list(self.processes.items()):
+                    if process.is_alive():
+                        continue
+                    if cluster_id not in dead_since:
+                        print(f"Cluster {cluster_id} (pid {process.pid}) exited with code {process.exitcode}")
+                        dead_since[cluster_id] = time.monotonic()
+                    elif time.monotonic() - dead_since[cluster_id] >= RESTART_DELAY:
+                        del dead_since[cluster_id]
+                        self.restarts[cluster_id] = self.restarts.get(cluster_id, 0) + 1
+                        self.health.pop(cluster_id, None)
+                        self.spawn(cluster_id)
+
+                if time.monotonic() >= next_report:
+                    next_report += HEALTH_INTERVAL
+                    self.report()
+        except KeyboardInterrupt:
+            print("Stopping cluster...")
+        finally:
+            for process in self.processes.values():
+                if process.is_alive():
+                    process.terminate()
+            for process in self.processes.values():
+                process.join(timeout=15)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run TickleBot as a multi-process shard cluster.")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument("--shards", type=int, default=None,
+                        help="total shard count (default: Discord's recommendation)")
+    parser.add_argument("--force-sync", action="store_true",
+                        help="re-upload slash commands even if unchanged")
+    parser.add_argument("--metrics-port", type=int, default=int(os.environ.get("TICKLE_METRICS_PORT", "0") or 0),
+                        help="first metrics port; worker N serves on port + N (default: TICKLE_METRICS_PORT)")
+    args = parser.parse_args()
+
+    shard_count = args.shards
+    if shard_count is None:
+        from main import TOKEN
+        shard_count = asyncio.run(fetch_recommended_shards(TOKEN))
+        print(f"Discord recommends {shard_count} shard(s)")
+
+    if os.environ.get("TICKLE_STORAGE", "json").lower() != "sqlite":
+        print("Warning: cluster workers always use SQLite storage (TICKLE_STORAGE=sqlite); "
+              "run `python -m utils.sqlite_backend import` first if you were on JSON files")
+
+    ranges = shard_ranges(shard_count, args.processes)
+    Launcher(ranges, shard_count, args.force_sync, args.metrics_port).run()
+
+if __name__ == "__main__":
+    main()
@@ -1,43 +1,190 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-from utils.question_loader import load_questions
+from utils.question_loader import reload_store, rerate_question, remove_question, CATEGORIES, RATINGS
+from utils.pack_registry import pack_registry, DEFAULT_PACK
+from utils.similarity_index import remove_from_similarity_index
+from utils.metrics import metrics, Histogram
 import os
 
+CATEGORY_CHOICES = [app_commands.Choice(name=cat, value=cat) for cat in CATEGORIES]
+
+RATING_CHOICES = [
+    app_commands.Choice(name="PG", value="pg"),
+    app_commands.Choice(name="PG-13", value="pg13"),
+    app_commands.Choice(name="R", value="r")
+]
+
+def describe_question(question, pack):
+    embed = discord.Embed(
+        title=f"Question {question.id}",
+        description=question.text,
+        color=discord.Color.blurple()
+    )
+    embed.add_field(name="Category", value=question.category)
+    embed.add_field(name="Rating", value=question.rating.upper())
+    embed.add_field(name="Pack", value=pack)
+    return embed
+
 class AdminCommands(commands.Cog):
+    # Look up and fix questions by the ID shown in their footer
+    question = app_commands.Group(
+        name="question",
+        description="Inspect or fix a question by ID (Admin only)",
+        default_permissions=discord.Permissions(administrator=True)
+    )
+
     def __init__(self, bot):
         self.bot = bot
 
+    async def lookup(self, interaction, question_id, category):
+        """
+        Returns (pack name, Question) for the one question with this ID, or
+        replies that there is none or that the ID is ambiguous and returns
+        (None, None).
+        """
+        matches = pack_registry.find_all(question_id, category.value if category else None)
+        if not matches:
+            await interaction.response.send_message(f"❓ No question with ID `{question_id}`.", ephemeral=True)
+            return None, None
+        if len(matches) > 1:
+            places = ", ".join(f"{q.category} ({pack})" for pack, q in matches)
+            await interaction.response.send_message(
+                f"⚠️ `{question_id}` is ambiguous, it's in {places}. Pass `category` to pick one.",
+                ephemeral=True
+            )
+            return None, None
+        return matches[0]
+
+    async def find_editable(self, interaction, question_id, category):
+        """
+        Returns the default-pack question with this ID, or replies with why
+        it can't be edited and returns None.
+        """
+        pack, found = await self.lookup(interaction, question_id, category)
+        if found is None:
+            return None
+        if pack != DEFAULT_PACK:
+            await interaction.response.send_message(
+                f"⚠️ `{question_id}` is in the `{pack}` pack; edit `packs/{pack}` and use /reload-questions.",
+                ephemeral=True
+            )
+            return None
+        return found
+
+    @question.command(name="show", description="Show a question by ID")
+    @app_commands.describe(question_id="The ID from the question's footer", category="Only needed if the ID is ambiguous")
+    @app_commands.choices(category=CATEGORY_CHOICES)
+    async def show_question(self, interaction: discord.Interaction, question_id: str, category: app_commands.Choice[str] = None):
+        pack, found = await self.lookup(interaction, question_id.strip(), category)
+        if found is None:
+            return
+        await interaction.response.send_message(embed=describe_question(found, pack), ephemeral=True)
+
+    @question.command(name="rerate", description="Change a question's rating")
+    @app_commands.describe(question_id="The ID from the question's footer", rating="The new rating", category="Only needed if the ID is ambiguous")
+    @app_commands.choices(rating=RATING_CHOICES, category=CATEGORY_CHOICES)
+    async def rerate(self, interaction: discord.Interaction, question_id: str, rating: app_commands.Choice[str], category: app_commands.Choice[str] = None):
+        found = await self.find_editable(interaction, question_id.strip(), category)
+        if found is None:
+            return
+        old_rating = found.rating
+        question = await rerate_question(found.id, rating.value, found.category)
+        if question is None:
+            await interaction.response.send_message("⚠️ Questions failed to load, not changing anything.", ephemeral=True)
+            return
+        await interaction.response.send_message(
+            f"✅ `{question.id}` re-rated {old_rating.upper()} → {question.rating.upper()}.",
+            embed=describe_question(question, DEFAULT_PACK),
+            ephemeral=True
+        )
+
+    @question.command(name="remove", description="Remove a question from play")
+    @app_commands.describe(question_id="The ID from the question's footer", category="Only needed if the ID is ambiguous")
+    @app_commands.choices(category=CATEGORY_CHOICES)
+    async def remove(self, interaction: discord.Interaction, question_id: str, category: app_commands.Choice[str] = None):
+        found = await self.find_editable(interaction, question_id.strip(), category)
+        if found is None:
+            return
+        question = await remove_question(found.id, found.category)
+        if question is None:
+            await interaction.response.send_message("⚠️ Questions failed to load, not changing anything.", ephemeral=True)
+            return
+        remove_from_similarity_index(question.category, question)
+        await interaction.response.send_message(
+            f"🗑️ Removed `{question.id}`.",
+            embed=describe_question(question, DEFAULT_PACK),
+            ephemeral=True
+        )
+
     @app_commands.command(name="reload-questions", description="Reload questions from JSON file (Admin only)")
     @app_commands.default_permissions(administrator=True)
     async def reload_questions(self, interaction: discord.Interaction):
-        # We don't need to do anything complex here because the random question loader
-        # reads from the file or re-loads if we clear a cache.
-        # In our simple implementation, get_random_question loads fresh every time 
-        # OR we can improve performance by caching. 
-        # For this requirement "Reload questions... without restarting":
-        
-        # NOTE: Our current utils/question_loader.py implementation of 'get_random_question'
-        # has a `data=None` argument which calls `load_questions()`.
-        # However, to be efficient, `load_questions` reads the file every time.
-        # This satisfies the requirement "Add/remove... without breaking... reload dynamically".
-        # So essentially, this command just confirms the file is valid.
-        
-        questions = load_questions()
-        
-        t_count = len(questions.get("truths", []))
-        d_count = len(questions.get("dares", []))
-        
-        if t_count == 0 and d_count == 0:
-             await interaction.response.send_message(
-                "⚠️ Warning: `questions.json` appears to be empty or malformed.",
+        # Rebuilding a large set can outlast the 3s an interaction may wait
+        await interaction.response.defer(ephemeral=True)
+        # Same path the file watcher uses: rebuild off the loop, then swap in
+        try:
+            store = await reload_store()
+            # Other packs are re-read lazily the next time a guild draws from them
+            pack_names = await pack_registry.refresh()
+        except Exception as e:
+            await interaction.followup.send(
+                f"⚠️ Could not reload `questions.json`, still serving the previous set.\n`{e}`",
                 ephemeral=True
             )
-        else:
-            await interaction.response.send_message(
-                f"✅ Successfully reloaded questions!\nTruths: {t_count}\nDares: {d_count}",
+            return
+        
+        total = sum(store.count(cat) for cat in CATEGORIES)
+        if total == 0:
+            await interaction.followup.send(
+                "⚠️ Warning: `questions.json` appears to be empty or malformed.",
                 ephemeral=True
             )
+            return
+        
+        lines = []
+        for cat in CATEGORIES:
+            by_rating = " / ".join(f"{r.upper()} {store.count(cat, r)}" for r in RATINGS)
+            lines.append(f"**{cat}**: {store.count(cat)} ({by_rating})")
+            
+        await interaction.followup.send(
+            f"✅ Successfully reloaded {total} questions in {store.build_seconds * 1000:.1f} ms!\n" + "\n".join(lines)
+            + f"\n📦 Packs available: {', '.join(pack_names)}",
+            ephemeral=True
+        )
+
+    @app_commands.command(name="sync-commands", description="Re-upload slash commands even if unchanged (Admin only)")
+    @app_commands.default_permissions(administrator=True)
+    async def sync_commands(self, interaction: discord.Interaction):
+        # Syncing can take several seconds, longer than an interaction may wait
+        await interaction.response.defer(ephemeral=True)
+        results = await self.bot.sync_commands(force=True)
+        lines = [
+            f"**{scope}**: {len(synced)} command(s)" if synced is not None else f"**{scope}**: failed"
+            for scope, synced in results.items()
+        ]
+        await interaction.followup.send("🔄 Synced commands\n" + ("\n".join(lines) or "Sync failed, see logs."), ephemeral=True)
+
+    @app_commands.command(name="bot-metrics", description="Show latency and counter metrics (Admin only)")
+    @app_commands.default_permissions(administrator=True)
+    async def show_metrics(self, interaction: discord.Interaction):
+        lines = []
+        for name, cls, family in metrics.families():
+            for labels, metric in sorted(family.items()):
+                label = name + ("{" + ",".join(f"{k}={v}" for k, v in labels) + "}" if labels else "")
+                if cls is Histogram:
+                    lines.append(
+                        f"{label}: n={metric.count} p50={metric.quantile(0.5) * 1000:.2f}ms "
+                        f"p99={metric.quantile(0.99) * 1000:.2f}ms max={metric.max * 1000:.2f}ms"
+                    )
+                else:
+                    lines.append(f"{label}: {metric.value:g}")
+        
+        text = "\n".join(lines) or "No metrics recorded yet."
+        # Stay under Discord's 2000 character message limit
+        if len(text) > 1900:
+            text = text[:1900] + "\n…"
+        await interaction.response.send_message(f"```\n{text}\n```", ephemeral=True)
 
 async def setup(bot):
     await bot.add_cog(AdminCommands(bot))
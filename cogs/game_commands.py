@@ -1,14 +1,95 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-from utils.question_loader import get_random_question
+from utils.question_deck import draw_question
 from utils.embed_builder import build_question_embed
-from utils.server_config import set_allowed_channels, get_allowed_channel, get_allowed_ratings
+from utils.server_config import (
+    set_allowed_channels, get_channel_ratings, get_denial_message, get_guild_packs, ALL_RATINGS
+)
+from utils.pack_registry import pack_registry
+from utils.rate_limiter import rate_limiter
+from utils.message_edits import message_edits
+from utils.metrics import metrics
+import asyncio
 import random
 
+# Buttons carry their game state in the custom_id, so no per-message view is
+# kept around and clicks keep working after a restart
+CUSTOM_ID_PREFIX = "tickle"
+
+# Seconds a slash command waits for a pack to load before asking to retry
+PACK_LOAD_WAIT = 2.0
+
+RATE_LIMIT_MESSAGES = {
+    "user": "⏳ You're clicking too fast! Please wait {:.1f}s.",
+    "channel": "⏳ This channel is playing too fast! Please wait {:.1f}s.",
+    "guild": "⏳ This server is playing too fast! Please wait {:.1f}s.",
+}
+
+async def check_rate_limit(interaction):
+    """
+    Counts one game action against the user, channel and guild limits.
+    Sends an ephemeral notice and returns False if any of them is exhausted.
+    """
+    guild_id = interaction.guild.id if interaction.guild else None
+    limited = rate_limiter.hit(interaction.user.id, interaction.channel.id, guild_id)
+    if limited is None:
+        return True
+    scope, retry_after = limited
+    metrics.counter("tickle_rate_limited_total", "Game actions rejected by the rate limiter", scope=scope).inc()
+    await interaction.response.send_message(RATE_LIMIT_MESSAGES[scope].format(retry_after), ephemeral=True)
+    return False
+
+async def send_reply(interaction, **kwargs):
+    """
+    Answers the interaction, through a followup if it was deferred.
+    """
+    if interaction.response.is_done():
+        await interaction.followup.send(**kwargs)
+    else:
+        await interaction.response.send_message(**kwargs)
+
+async def guild_stores(interaction, guild_id):
+    """
+    Returns the question stores for the guild's packs. If one of them has to
+    be loaded from disk first, a button click is deferred so the load can't
+    run past the 3s response deadline; its followups can still be ephemeral.
+    """
+    packs = get_guild_packs(guild_id)
+    if not pack_registry.ready(packs):
+        await interaction.response.defer()
+    return await pack_registry.stores_for(packs)
+
+async def command_stores(interaction, guild_id, question_type, rating, allowed_ratings):
+    """
+    Like guild_stores, for slash commands. Their deferred reply can't change
+    visibility later, so it is only deferred (publicly) when a pack already
+    in memory guarantees a question to show. Otherwise the load gets
+    PACK_LOAD_WAIT seconds; if it needs longer, the user is asked to retry
+    while it finishes in the background, and None is returned.
+    """
+    packs = get_guild_packs(guild_id)
+    if pack_registry.ready(packs):
+        return await pack_registry.stores_for(packs)
+    loaded = pack_registry.loaded_stores(packs)
+    if any(store.select_pools(question_type, rating, allowed_ratings)[1] for _, store in loaded):
+        await interaction.response.defer(thinking=True)
+        return await pack_registry.stores_for(packs)
+    loading = asyncio.ensure_future(pack_registry.stores_for(packs))
+    try:
+        return await asyncio.wait_for(asyncio.shield(loading), PACK_LOAD_WAIT)
+    except asyncio.TimeoutError:
+        await interaction.response.send_message(
+            "📦 This server's question packs are still loading, try again in a moment.", ephemeral=True
+        )
+        return None
+
 class GameView(discord.ui.View):
-    # Rate limit: 1 use per 2 seconds per user
-    _cooldowns = {} 
+    """
+    The buttons under a question. Only used to send them: every item is a
+    GameButton, which discord.py dispatches by custom_id, so the view itself
+    is not stored once the message is sent.
+    """
 
     def __init__(self, mode, rating=None, current_question_id=None):
         super().__init__(timeout=None)
@@ -36,61 +117,69 @@ class GameView(discord.ui.View):
              self.add_button("Surprise Me", discord.ButtonStyle.blurple, "random")
 
     def add_button(self, label, style, type_str):
-        button = discord.ui.Button(label=label, style=style)
-        
-        async def callback(interaction):
-            await self.handle_click(interaction, type_str)
-            
-        button.callback = callback
-        self.add_item(button)
+        self.add_item(GameButton(self.mode, type_str, self.rating, self.current_question_id, label=label, style=style))
+
+class GameButton(
+    discord.ui.DynamicItem[discord.ui.Button],
+    template=CUSTOM_ID_PREFIX + r":(?P<mode>[a-z]+):(?P<choice>[a-z]+):(?P<rating>[a-z0-9]*):(?P<question_id>.*)"
+):
+    """
+    A game button whose mode, button choice, rating and last question ID are
+    encoded as "tickle:<mode>:<choice>:<rating>:<question id>".
+    """
+
+    def __init__(self, mode, choice, rating=None, question_id=None, label=None, style=discord.ButtonStyle.primary):
+        question_id = str(question_id) if question_id is not None else ""
+        custom_id = f"{CUSTOM_ID_PREFIX}:{mode}:{choice}:{rating or ''}:"
+        # custom_id is capped at 100 characters; the ID is informational only
+        if len(custom_id) + len(question_id) <= 100:
+            custom_id += question_id
+        super().__init__(discord.ui.Button(label=label, style=style, custom_id=custom_id))
+        self.mode = mode
+        self.choice = choice
+        self.rating = rating or None
+        self.question_id = question_id or None
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(
+            match["mode"], match["choice"], match["rating"], match["question_id"],
+            label=item.label, style=item.style
+        )
+
+    async def callback(self, interaction: discord.Interaction):
+        await self.handle_click(interaction, self.choice)
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
-        # 1. Check Rate Limit
-        user_id = interaction.user.id
-        now = interaction.created_at.timestamp()
-        
-        last_time = self._cooldowns.get(user_id, 0)
-        if now - last_time < 2.0:
-            retry_after = 2.0 - (now - last_time)
-            await interaction.response.send_message(
-                f"⏳ You're clicking too fast! Please wait {retry_after:.1f}s.",
-                ephemeral=True
-            )
+        guild_id = interaction.guild.id if interaction.guild else None
+        allowed_ratings = get_channel_ratings(guild_id, interaction.channel.id)
+
+        # 1. Check Allowed Channel
+        if interaction.guild and allowed_ratings is None:
+            await interaction.response.send_message(get_denial_message(interaction.guild.id), ephemeral=True)
             return False
-        
-        # 2. Check Allowed Channel and Ratings
-        if interaction.guild:
-            allowed_config = get_allowed_channel(interaction.guild.id)
-            if allowed_config:
-                # If config exists, user must be in Main OR NSFW
-                main_id = allowed_config.get("main")
-                nsfw_id = allowed_config.get("nsfw")
-                
-                cid = interaction.channel.id
-                if cid != main_id and cid != nsfw_id:
-                   # Construct helpful message
-                   msg = f"⛔ Please play in <#{main_id}>"
-                   if nsfw_id:
-                       msg += f" or <#{nsfw_id}>"
-                   await interaction.response.send_message(msg + "!", ephemeral=True)
-                   return False
-                
-        self._cooldowns[user_id] = now
-        if len(self._cooldowns) > 1000: self._cooldowns.clear()
-        
-        return True
 
+        # 2. Check Rating. A game started with an explicit rating (e.g. "R" in
+        # an NSFW channel) can't be continued where that rating isn't allowed.
+        if self.rating and self.rating not in (allowed_ratings or ()):
+            await interaction.response.send_message("⛔ R-rated content is not allowed in this channel.", ephemeral=True)
+            return False
+
+        # 3. Check Rate Limit last, so only clicks that will play spend a token
+        return await check_rate_limit(interaction)
+
+    @metrics.timed("tickle_command_seconds", "Game command and button handling time", command="handle_click")
     async def handle_click(self, interaction: discord.Interaction, type_choice: str):
-        # Disable previous view
-        try:
-            await interaction.message.edit(view=None)
-        except:
-            pass
-            
+        # Respond first: everything before send_reply below is local work, so
+        # the reply goes out well inside the 3s deadline (a pack that still has
+        # to be loaded defers first). The old message's buttons are removed
+        # afterwards in the background.
+
         # Determine allowed ratings for this channel
-        allowed_ratings = ["pg", "pg13", "r"] # Default
-        if interaction.guild:
-            allowed_ratings = get_allowed_ratings(interaction.guild.id, interaction.channel.id)
+        guild_id = interaction.guild.id if interaction.guild else None
+        allowed_ratings = get_channel_ratings(guild_id, interaction.channel.id)
+        if allowed_ratings is None:
+            allowed_ratings = frozenset() # Should be blocked by interaction_check
 
         # Determine type
         final_type = type_choice
@@ -100,63 +189,48 @@ class GameView(discord.ui.View):
             elif self.mode == "random":
                 final_type = random.choice(["truth", "dare", "wyr", "nhie", "paranoia"])
         
-        # Enforce rating on click:
-        # If self.rating was set (e.g. they started a "R" game), we try to respect it.
-        # But if we are in a channel that doesn't allow "R", we must block or downgrade.
-        # Current logic: If self.rating is NOT in allowed_ratings, pick a random allowed rating or fail?
-        # Better: If self.rating is explicit (not None) and NOT allowed -> Error.
-        # If self.rating is None -> Pick random valid rating question.
-        
+        # An explicit rating is known to be allowed here (interaction_check)
         target_rating = self.rating
-        if target_rating and target_rating not in allowed_ratings:
-             # Retain rating but block if invalid?
-             # Or auto-switch?
-             # For interaction flow (next button), if they started an "R" game in "NSFW" channel,
-             # and the button click is still there, it's fine.
-             # But if they somehow clicked it elsewhere? (Interaction check handles channel).
-             # So if we are in Main (PG only) and self.rating is "r", we should block.
-             await interaction.response.send_message("⛔ R-rated content is not allowed in this channel.", ephemeral=True)
-             return
 
-        # If target_rating is None (Random rating), we let get_random_question handle filtering?
-        # question_loader doesn't take a LIST of allowed ratings, it takes a specific one or None.
-        # So filtering needs to happen here or in loader.
-        # If target_rating is None, we need to ensure the fetched question is within allowed list.
-        # Simple fix: Loop until valid? Or Update loader.
-        # Implementation: Loop (simple) or pass filter.
-        # Since loader is simple, let's just loop a few times.
-        
-        question = None
-        for _ in range(10):
-            q = get_random_question(final_type, target_rating, exclude_id=self.current_question_id)
-            if q:
-                 if q.get('rating') in allowed_ratings:
-                     question = q
-                     break
-                 # If we requested a specific rating and it wasn't allowed (checked above), we wouldn't be here.
-                 # If we requested None, we might get 'r', so we retry.
+        stores = await guild_stores(interaction, guild_id)
+        question = draw_question(
+            guild_id, interaction.channel.id,
+            final_type, target_rating,
+            allowed_ratings=allowed_ratings,
+            stores=stores
+        )
         
         if not question:
             # Fallback logic
              if type_choice == "random":
                  # Retry loosely
+                 metrics.counter("tickle_question_retries_total", "Draws retried with a looser type").inc()
                  final_type = random.choice(["truth", "dare"]) if self.mode == "tod" else "truth"
                  # Try again with same rating logic
-                 question = get_random_question(final_type, target_rating)
+                 question = draw_question(
+                     guild_id, interaction.channel.id,
+                     final_type, target_rating,
+                     allowed_ratings=allowed_ratings,
+                     stores=stores
+                 )
             
-             if not question or (question.get('rating') not in allowed_ratings):
-                await interaction.response.send_message("No questions found for allowed ratings!", ephemeral=True)
+             if not question:
+                metrics.counter("tickle_no_questions_total", "Draws that found no matching question", source="handle_click").inc()
+                await send_reply(interaction, content="No questions found for allowed ratings!", ephemeral=True)
                 return
 
         embed = build_question_embed(question, final_type.upper(), requestor=interaction.user)
-        new_view = GameView(mode=self.mode, rating=self.rating, current_question_id=question.get('id'))
+        new_view = GameView(mode=self.mode, rating=self.rating, current_question_id=question.id)
         
         # 10% chance for tip
         content = None
         if random.random() < 0.1:
             content = "<a:tip_emoji:1469795864259330119> Tip: Use /suggest to suggest new questions dares wyr ect !!"
             
-        await interaction.response.send_message(content=content, embed=embed, view=new_view)
+        await send_reply(interaction, content=content, embed=embed, view=new_view)
+        
+        # Disable previous view
+        message_edits.submit(interaction.message, view=None)
 
 
 class GameCommands(commands.Cog):
@@ -166,43 +240,35 @@ class GameCommands(commands.Cog):
     async def check_channel_and_rating(self, interaction, requested_rating):
         """
         Checks if the channel is allowed and if the requested rating is permitted.
-        Returns (True, allowed_ratings_list) or (False, None).
+        Returns (True, allowed_ratings) or (False, None).
         Sends ephemeral error if false.
         """
         if not interaction.guild:
-            return True, ["pg", "pg13", "r"] # DMs allowed all?
+            return True, ALL_RATINGS # DMs allowed all?
             
-        allowed_config = get_allowed_channel(interaction.guild.id)
-        if allowed_config:
-            main_id = allowed_config.get("main")
-            nsfw_id = allowed_config.get("nsfw")
-            cid = interaction.channel.id
+        allowed_ratings = get_channel_ratings(interaction.guild.id, interaction.channel.id)
+        if allowed_ratings is None:
+            await interaction.response.send_message(get_denial_message(interaction.guild.id), ephemeral=True)
+            return False, None
             
-            if cid != main_id and cid != nsfw_id:
-                msg = f"⛔ Use <#{main_id}>"
-                if nsfw_id: msg += f" or <#{nsfw_id}>"
-                await interaction.response.send_message(msg + ".", ephemeral=True)
-                return False, None
-                
-            allowed_ratings = get_allowed_ratings(interaction.guild.id, cid, allowed_config)
-            
-            if requested_rating and requested_rating not in allowed_ratings:
-                await interaction.response.send_message(
-                    f"⛔ Rating '{requested_rating.upper()}' is not allowed in this channel.", 
-                    ephemeral=True
-                )
-                return False, None
-                
-            return True, allowed_ratings
+        if requested_rating and requested_rating not in allowed_ratings:
+            await interaction.response.send_message(
+                f"⛔ Rating '{requested_rating.upper()}' is not allowed in this channel.", 
+                ephemeral=True
+            )
+            return False, None
             
-        return True, ["pg", "pg13", "r"]
+        return True, allowed_ratings
 
+    @metrics.timed("tickle_command_seconds", "Game command and button handling time", command="start_game")
     async def start_game(self, interaction, mode, rating):
         rating_val = rating.value if rating else None
         
         is_allowed, allowed_ratings = await self.check_channel_and_rating(interaction, rating_val)
         if not is_allowed:
             return
+        if not await check_rate_limit(interaction):
+            return
             
         # Initial Pick
         type_choice = mode
@@ -210,15 +276,20 @@ class GameCommands(commands.Cog):
         elif mode == "random": type_choice = random.choice(["truth", "dare", "wyr", "nhie", "paranoia"])
         
         # Fetch question respecting allowed ratings
-        question = None
-        for _ in range(15):
-             q = get_random_question(type_choice, rating_val)
-             if q and q.get("rating") in allowed_ratings:
-                 question = q
-                 break
+        guild_id = interaction.guild.id if interaction.guild else None
+        stores = await command_stores(interaction, guild_id, type_choice, rating_val, allowed_ratings)
+        if stores is None:
+            return
+        question = draw_question(
+            guild_id, interaction.channel.id,
+            type_choice, rating_val,
+            allowed_ratings=allowed_ratings,
+            stores=stores
+        )
         
         if not question:
-             await interaction.response.send_message("No questions found matching criteria!", ephemeral=True)
+             metrics.counter("tickle_no_questions_total", "Draws that found no matching question", source="start_game").inc()
+             await send_reply(interaction, content="No questions found matching criteria!", ephemeral=True)
              return
              
         embed = build_question_embed(question, type_choice.upper(), requestor=interaction.user)
@@ -227,14 +298,14 @@ class GameCommands(commands.Cog):
         view_mode = mode
         if mode in ["truth", "dare"]: view_mode = "tod"
         
-        view = GameView(mode=view_mode, rating=rating_val, current_question_id=question.get('id'))
+        view = GameView(mode=view_mode, rating=rating_val, current_question_id=question.id)
         
         # 10% chance for tip
         content = None
         if random.random() < 0.1:
             content = "<a:tip_emoji:1469795864259330119> Tip: Use /suggest to suggest new questions dares wyr ect !!"
             
-        await interaction.response.send_message(content=content, embed=embed, view=view)
+        await send_reply(interaction, content=content, embed=embed, view=view)
 
     @app_commands.command(name="truth", description="Get a random truth")
     @app_commands.describe(rating="Rating")
@@ -279,14 +350,29 @@ class GameCommands(commands.Cog):
         await self.start_game(interaction, "random", rating)
 
     @app_commands.command(name="setup", description="Configure game channels")
-    @app_commands.describe(channel="Main channel (PG/PG-13)", nsfw_channel="Optional NSFW channel (Allows R)")
+    @app_commands.describe(
+        channel="Main channel (PG/PG-13)",
+        nsfw_channel="Optional NSFW channel (Allows R)",
+        packs="Optional comma-separated question packs to play with (default: default)"
+    )
     @app_commands.default_permissions(administrator=True)
-    async def setup(self, interaction, channel: discord.TextChannel, nsfw_channel: discord.TextChannel = None):
+    async def setup(self, interaction, channel: discord.TextChannel, nsfw_channel: discord.TextChannel = None, packs: str = None):
         if not interaction.user.guild_permissions.administrator:
             return await interaction.response.send_message("Perms denied.", ephemeral=True)
         
+        pack_names = None
+        if packs:
+            available = await pack_registry.discover()
+            pack_names = list(dict.fromkeys(p.strip().lower() for p in packs.split(",") if p.strip()))
+            unknown = [p for p in pack_names if p not in available]
+            if unknown:
+                return await interaction.response.send_message(
+                    f"Unknown pack(s): {', '.join(unknown)}. Available: {', '.join(available)}",
+                    ephemeral=True
+                )
+        
         nsfw_id = nsfw_channel.id if nsfw_channel else None
-        set_allowed_channels(interaction.guild.id, channel.id, nsfw_id)
+        await set_allowed_channels(interaction.guild.id, channel.id, nsfw_id, pack_names)
         
         msg = f"✅ **Setup Complete!**\n🔹 **Main Channel**: {channel.mention} (PG/PG-13)"
         if nsfw_channel:
@@ -295,8 +381,11 @@ class GameCommands(commands.Cog):
             msg += "\n(No NSFW channel set - 'R' rating allowed in Main by default? No, logic says if NSFW not set, Main allows All. Wait.)"
             # Correction in display message to match logic
             msg = f"✅ **Setup Complete!**\n🔹 **Game Channel**: {channel.mention} (All Ratings Allowed)"
+        msg += f"\n📦 **Packs**: {', '.join(get_guild_packs(interaction.guild.id))}"
             
         await interaction.response.send_message(msg, ephemeral=True)
 
 async def setup(bot):
+    # One handler for every game button, including ones sent before a restart
+    bot.add_dynamic_items(GameButton)
     await bot.add_cog(GameCommands(bot))
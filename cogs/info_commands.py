@@ -1,7 +1,11 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-from utils.question_loader import load_questions
+from utils.question_loader import CATEGORIES
+from utils.question_deck import draw_counts
+from utils.pack_registry import pack_registry
+from utils.server_config import get_guild_packs
+from utils.suggestion_manager import count_suggestions
 
 class InfoCommands(commands.Cog):
     def __init__(self, bot):
@@ -9,9 +13,13 @@ class InfoCommands(commands.Cog):
 
     @app_commands.command(name="tickle-stats", description="Show statistics about the question pool")
     async def tickle_stats(self, interaction: discord.Interaction):
-        questions = load_questions()
+        # Counts come straight from the rating buckets of the packs already in
+        # memory; stats never load a pack or keep one from being evicted
+        guild_id = interaction.guild.id if interaction.guild else None
+        packs = get_guild_packs(guild_id)
+        loaded = pack_registry.loaded_stores(packs)
+        stores = [store for _, store in loaded]
         
-        categories = ["truths", "dares", "wyr", "nhie", "paranoia"]
         embed = discord.Embed(
             title="📊 Tickle Bot Stats",
             color=discord.Color.blurple()
@@ -19,25 +27,33 @@ class InfoCommands(commands.Cog):
         
         total_questions = 0
         
-        for cat in categories:
-            items = questions.get(cat, [])
-            count = len(items)
+        for cat in CATEGORIES:
+            by_rating = {}
+            for store in stores:
+                for rating, n in store.rating_counts(cat).items():
+                    by_rating[rating] = by_rating.get(rating, 0) + n
+            count = sum(by_rating.values())
             total_questions += count
             
-            pg = len([q for q in items if q.get("rating", "").lower() == "pg"])
-            pg13 = len([q for q in items if q.get("rating", "").lower() == "pg13"])
-            r = len([q for q in items if q.get("rating", "").lower() == "r"])
+            pg = by_rating.get("pg", 0)
+            pg13 = by_rating.get("pg13", 0)
+            r = by_rating.get("r", 0)
             
             # Format title nicely (e.g. "nhie" -> "NHIE", "wyr" -> "WYR")
             title = cat.upper() if cat in ["wyr", "nhie"] else cat.capitalize()
             
             embed.add_field(
                 name=title,
-                value=f"**Total: {count}**\nPG: {pg}\nPG-13: {pg13}\nR: {r}",
+                value=f"**Total: {count}**\nPG: {pg}\nPG-13: {pg13}\nR: {r}\nPlayed: {draw_counts[cat].value}",
                 inline=True
             )
             
         embed.description = f"**Total Questions in Database: {total_questions}**"
+        counted = {name for name, _ in loaded}
+        unloaded = [name for name in packs if name not in counted]
+        if unloaded:
+            embed.description += f"\n(Not counted, not loaded yet: {', '.join(unloaded)})"
+        embed.set_footer(text=f"Pending suggestions: {await count_suggestions()} | Played counts are since the last restart")
         
         await interaction.response.send_message(embed=embed)
 
@@ -76,7 +92,9 @@ class InfoCommands(commands.Cog):
             value=(
                 "• **/setup [channel] [nsfw_channel]**: Configure game channels. If NSFW channel is set, R-rated content is restricted to it.\n"
                 "• **/reload-questions**: Reload the questions file.\n"
-                "• **/approve-cycle**: Review user suggestions."
+                "• **/question show|rerate|remove**: Look up or fix a question by its ID.\n"
+                "• **/approve-cycle**: Review user suggestions.\n"
+                "• **/approve-bulk**: Approve or deny many suggestions at once."
             ),
             inline=False
         )
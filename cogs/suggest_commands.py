@@ -1,112 +1,17 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-import json
-import os
-import random
-import string
-
-SUGGESTIONS_FILE = 'data/suggestions.json'
-QUESTIONS_FILE = 'questions.json'
-
-def load_suggestions():
-    if not os.path.exists(SUGGESTIONS_FILE):
-        return []
-    try:
-        with open(SUGGESTIONS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except:
-        return []
-
-def save_suggestions(suggestions):
-    if not os.path.exists('data'):
-        os.makedirs('data')
-    with open(SUGGESTIONS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(suggestions, f, indent=4)
-
-def add_to_main_questions(text, type_str, rating):
-    try:
-        with open(QUESTIONS_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-    except:
-        data = {"truths": [], "dares": []}
-
-    type_str = type_str.lower()
-    
-    if type_str == "truth":
-        category = "truths"
-    elif type_str == "dare":
-        category = "dares"
-    elif type_str == "wyr":
-        category = "wyr"
-    elif type_str == "nhie":
-        category = "nhie"
-    elif type_str == "paranoia":
-        category = "paranoia"
-    else:
-        category = "truths" # Fallback
-
-    pool = data.get(category, [])
-    
-    new_id = None
-    all_ids = {item.get('id') for item in pool}
-    
-    while True:
-        # Generate 7 random lowercase alphanumeric
-        import string
-        new_id = ''.join(random.choices(string.ascii_lowercase + string.digits, k=7))
-        if new_id not in all_ids:
-            break
-            
-    new_entry = {
-        "id": new_id,
-        "rating": rating.lower(),
-        "question": text 
-    }
-    
-    # Existing logic: "question" if category == "truths" else "dare": text
-    # New logic: most are questions. Dares are dares.
-    if category == "dares":
-        new_entry["dare"] = text
-    else:
-        new_entry["question"] = text
-    
-    pool.append(new_entry)
-    data[category] = pool # Ensure it's set back
-    
-    with open(QUESTIONS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2)
-    return new_entry
+from utils.similarity_index import find_similar
+from utils.suggestion_manager import add_suggestion
+from utils.review_queue import review_queue
 
-def check_duplicates(text, category):
-    from utils.question_loader import load_questions
-    import difflib
-    
-    data = load_questions()
-    cat_map = {
-        "truth": "truths", 
-        "dare": "dares",
-        "wyr": "wyr",
-        "nhie": "nhie",
-        "paranoia": "paranoia"
-    }
-    key = cat_map.get(category.lower(), "truths")
-    pool = data.get(key, [])
-    
-    similar = []
-    text_lower = text.lower()
-    
-    for item in pool:
-        q_text = item.get("question") or item.get("dare")
-        if not q_text: continue
-            
-        ratio = difflib.SequenceMatcher(None, text_lower, q_text.lower()).ratio()
-        if ratio >= 0.7: 
-            similar.append(f"({int(ratio*100)}%) {q_text[:60]}...")
-            
-    return similar[:3]
+# The only user allowed to review suggestions
+AUTHORIZED_USER_ID = 1467691908506583132
+
+async def check_duplicates(text, category):
+    return await find_similar(text, category, limit=3)
 
-def build_suggestion_embed(sg, index, total):
+async def build_suggestion_embed(sg, index, total):
     embed = discord.Embed(
         title="Suggestion Review",
         description=f"**{sg['type'].upper()}**: {sg['text']}",
@@ -116,7 +21,7 @@ def build_suggestion_embed(sg, index, total):
     embed.add_field(name="User", value=f"{sg['username']} ({sg['user_id']})")
     embed.set_footer(text=f"Suggestion {index + 1}/{total}")
     
-    duplicates = check_duplicates(sg['text'], sg['type'])
+    duplicates = await check_duplicates(sg['text'], sg['type'])
     if duplicates:
         embed.add_field(
             name="⚠️ Potential Duplicates", 
@@ -125,20 +30,37 @@ def build_suggestion_embed(sg, index, total):
         )
     return embed
 
+async def show_next(interaction, after_id, author_id, notice):
+    """
+    Moves the review message on to the suggestion after `after_id`.
+    """
+    sg, index, total = await review_queue.next_after(after_id)
+    if sg is None:
+        await interaction.response.edit_message(content=f"{notice}\nAll suggestions processed!", embed=None, view=None)
+        return
+    embed = await build_suggestion_embed(sg, index, total)
+    await interaction.response.edit_message(content=None, embed=embed, view=SuggestionView(sg['id'], author_id))
+    await interaction.followup.send(notice, ephemeral=True)
+
+async def review_one(interaction, suggestion_id, author_id, decision, notice):
+    applied, _ = await review_queue.commit([dict(decision, id=suggestion_id)])
+    if not applied:
+        notice = "⚠️ That suggestion was already reviewed."
+    await show_next(interaction, suggestion_id, author_id, notice)
+
 class SuggestionView(discord.ui.View):
-    def __init__(self, suggestion_index, author_id):
+    def __init__(self, suggestion_id, author_id):
         super().__init__(timeout=None)
-        self.index = suggestion_index
+        self.suggestion_id = suggestion_id
         self.author_id = author_id
 
     async def update_embed(self, interaction):
-        suggestions = load_suggestions()
-        if not suggestions or self.index >= len(suggestions):
-             await interaction.response.edit_message(content="No more suggestions!", embed=None, view=None)
-             return
+        sg, index, total = await review_queue.position(self.suggestion_id)
+        if sg is None:
+            await show_next(interaction, self.suggestion_id, self.author_id, "⚠️ That suggestion was already reviewed.")
+            return
 
-        sg = suggestions[self.index]
-        embed = build_suggestion_embed(sg, self.index, len(suggestions))
+        embed = await build_suggestion_embed(sg, index, total)
         
         await interaction.response.edit_message(embed=embed, view=self)
 
@@ -147,14 +69,14 @@ class SuggestionView(discord.ui.View):
         if interaction.user.id != self.author_id:
             return await interaction.response.send_message("Not authorized", ephemeral=True)
             
-        await interaction.response.edit_message(view=RatingView(self.index, self.author_id))
+        await interaction.response.edit_message(view=RatingView(self.suggestion_id, self.author_id))
 
     @discord.ui.button(label="Deny", style=discord.ButtonStyle.danger)
     async def deny(self, interaction: discord.Interaction, button: discord.ui.Button):
         if interaction.user.id != self.author_id:
             return await interaction.response.send_message("Not authorized", ephemeral=True)
             
-        await interaction.response.edit_message(view=ConfirmDenyView(self.index, self.author_id))
+        await interaction.response.edit_message(view=ConfirmDenyView(self.suggestion_id, self.author_id))
 
     @discord.ui.button(label="Stop", style=discord.ButtonStyle.secondary)
     async def stop(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -163,13 +85,13 @@ class SuggestionView(discord.ui.View):
         await interaction.message.delete()
 
 class RatingView(discord.ui.View):
-    def __init__(self, index, author_id):
+    def __init__(self, suggestion_id, author_id):
         super().__init__(timeout=None)
-        self.index = index
+        self.suggestion_id = suggestion_id
         self.author_id = author_id
 
     async def confirm_rating(self, interaction, rating):
-         await interaction.response.edit_message(view=ConfirmApproveView(self.index, self.author_id, rating))
+         await interaction.response.edit_message(view=ConfirmApproveView(self.suggestion_id, self.author_id, rating))
 
     @discord.ui.button(label="PG", style=discord.ButtonStyle.primary)
     async def pg(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -185,71 +107,189 @@ class RatingView(discord.ui.View):
 
     @discord.ui.button(label="Cancel", style=discord.ButtonStyle.secondary)
     async def cancel(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await interaction.response.edit_message(view=SuggestionView(self.index, self.author_id))
+        await interaction.response.edit_message(view=SuggestionView(self.suggestion_id, self.author_id))
 
 class ConfirmApproveView(discord.ui.View):
-    def __init__(self, index, author_id, rating):
+    def __init__(self, suggestion_id, author_id, rating):
         super().__init__(timeout=None)
-        self.index = index
+        self.suggestion_id = suggestion_id
         self.author_id = author_id
         self.rating = rating
 
     @discord.ui.button(label="Confirm Approval", style=discord.ButtonStyle.success)
     async def confirm(self, interaction: discord.Interaction, button: discord.ui.Button):
-        suggestions = load_suggestions()
-        if self.index >= len(suggestions):
-            await interaction.response.send_message("Error: Suggestion not found", ephemeral=True)
-            return
-
-        sg = suggestions.pop(self.index)
-        save_suggestions(suggestions)
-        
-        # Add to main questions
-        add_to_main_questions(sg['text'], sg['type'], self.rating)
-        
-        if suggestions:
-            new_index = 0 if self.index >= len(suggestions) else self.index
-            next_sg = suggestions[new_index]
-            embed = build_suggestion_embed(next_sg, new_index, len(suggestions))
-            
-            await interaction.response.edit_message(embed=embed, view=SuggestionView(new_index, self.author_id))
-            await interaction.followup.send(f"✅ Approved and added to DB as {self.rating.upper()}", ephemeral=True)
-        else:
-            await interaction.response.edit_message(content="✅ All suggestions processed!", embed=None, view=None)
+        await review_one(
+            interaction, self.suggestion_id, self.author_id,
+            {"status": "approved", "rating": self.rating},
+            f"✅ Approved and added to DB as {self.rating.upper()}"
+        )
 
     @discord.ui.button(label="Cancel", style=discord.ButtonStyle.secondary)
     async def cancel(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await interaction.response.edit_message(view=RatingView(self.index, self.author_id))
+        await interaction.response.edit_message(view=RatingView(self.suggestion_id, self.author_id))
 
 class ConfirmDenyView(discord.ui.View):
-    def __init__(self, index, author_id):
+    def __init__(self, suggestion_id, author_id):
         super().__init__(timeout=None)
-        self.index = index
+        self.suggestion_id = suggestion_id
         self.author_id = author_id
 
     @discord.ui.button(label="Confirm Deny", style=discord.ButtonStyle.danger)
     async def confirm(self, interaction: discord.Interaction, button: discord.ui.Button):
-        suggestions = load_suggestions()
-        if self.index >= len(suggestions):
-             await interaction.response.send_message("Error", ephemeral=True)
-             return
-             
-        suggestions.pop(self.index)
-        save_suggestions(suggestions)
-        
-        if suggestions:
-            new_index = 0 if self.index >= len(suggestions) else self.index
-            next_sg = suggestions[new_index]
-            embed = build_suggestion_embed(next_sg, new_index, len(suggestions))
-            
-            await interaction.response.edit_message(embed=embed, view=SuggestionView(new_index, self.author_id))
-            await interaction.followup.send("❌ Suggestion denied.", ephemeral=True)
-        else:
-            await interaction.response.edit_message(content="All suggestions processed!", embed=None, view=None)
+        await review_one(
+            interaction, self.suggestion_id, self.author_id,
+            {"status": "denied"},
+            "❌ Suggestion denied."
+        )
 
     @discord.ui.button(label="Cancel", style=discord.ButtonStyle.secondary)
     async def cancel(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await interaction.response.edit_message(view=SuggestionView(self.index, self.author_id))
+        await interaction.response.edit_message(view=SuggestionView(self.suggestion_id, self.author_id))
+
+# Bulk review: key -> label for the action menu
+BULK_ACTIONS = {
+    "suggested": "Approve with the suggested rating",
+    "pg": "Approve as PG",
+    "pg13": "Approve as PG-13",
+    "r": "Approve as R",
+    "deny": "Deny",
+    "clear": "Clear decision",
+}
+
+class BulkReviewView(discord.ui.View):
+    """
+    A page of pending suggestions in a select menu. The reviewer stages a
+    decision for any number of them, across pages, then commits them all at
+    once.
+    """
+
+    def __init__(self, author_id, page=0):
+        super().__init__(timeout=None)
+        self.author_id = author_id
+        self.page = page
+        # suggestion id -> staged decision, kept across pages until committed
+        self.decisions = {}
+        # suggestion id -> suggestion on the current page
+        self.shown = {}
+        self.selected = []
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("Not authorized", ephemeral=True)
+            return False
+        return True
+
+    def describe(self, sg):
+        decision = self.decisions.get(sg['id'])
+        if decision is None:
+            mark = "▫️"
+        elif decision['status'] == "denied":
+            mark = "❌"
+        else:
+            mark = f"✅ {decision['rating'].upper()}"
+        return f"{mark} **#{sg['id']}** {sg['type'].upper()} ({sg['rating'].upper()}): {sg['text'][:120]}"
+
+    async def render(self):
+        """
+        Reloads the current page and returns its embed.
+        """
+        items, self.page, page_count = await review_queue.page(self.page)
+        self.shown = {sg['id']: sg for sg in items}
+        self.selected = []
+
+        embed = discord.Embed(
+            title="Bulk Suggestion Review",
+            description="\n".join(self.describe(sg) for sg in items) or "No pending suggestions.",
+            color=discord.Color.orange()
+        )
+        embed.set_footer(text=f"Page {self.page + 1}/{page_count} | {len(self.decisions)} decision(s) staged")
+
+        if items:
+            self.pick.options = [
+                discord.SelectOption(
+                    label=f"#{sg['id']} {sg['type'].upper()}: {sg['text']}"[:100],
+                    value=str(sg['id']),
+                    description=f"Suggested {sg['rating'].upper()}"
+                )
+                for sg in items
+            ]
+        else:
+            self.pick.options = [discord.SelectOption(label="Nothing pending", value="none")]
+        self.pick.max_values = len(self.pick.options)
+        self.pick.disabled = not items
+        self.action.disabled = not items
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.page >= page_count - 1
+        self.commit.disabled = not self.decisions
+        self.commit.label = f"Commit {len(self.decisions)}" if self.decisions else "Commit"
+        return embed
+
+    @discord.ui.select(placeholder="Choose suggestions...", options=[discord.SelectOption(label="Loading", value="none")], row=0)
+    async def pick(self, interaction: discord.Interaction, select: discord.ui.Select):
+        self.selected = [int(v) for v in select.values if v != "none"]
+        await interaction.response.defer()
+
+    @discord.ui.select(
+        placeholder="...then choose what to do with them",
+        options=[discord.SelectOption(label=label, value=key) for key, label in BULK_ACTIONS.items()],
+        row=1
+    )
+    async def action(self, interaction: discord.Interaction, select: discord.ui.Select):
+        if not self.selected:
+            return await interaction.response.send_message("Choose some suggestions first.", ephemeral=True)
+
+        action = select.values[0]
+        for suggestion_id in self.selected:
+            sg = self.shown.get(suggestion_id)
+            if sg is None:
+                continue
+            if action == "clear":
+                self.decisions.pop(suggestion_id, None)
+            elif action == "deny":
+                self.decisions[suggestion_id] = {"id": suggestion_id, "status": "denied"}
+            else:
+                rating = sg['rating'] if action == "suggested" else action
+                self.decisions[suggestion_id] = {
+                    "id": suggestion_id, "status": "approved", "rating": rating
+                }
+
+        embed = await self.render()
+        await interaction.response.edit_message(embed=embed, view=self)
+
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.secondary, row=2)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page -= 1
+        embed = await self.render()
+        await interaction.response.edit_message(embed=embed, view=self)
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.secondary, row=2)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page += 1
+        embed = await self.render()
+        await interaction.response.edit_message(embed=embed, view=self)
+
+    @discord.ui.button(label="Commit", style=discord.ButtonStyle.success, row=2)
+    async def commit(self, interaction: discord.Interaction, button: discord.ui.Button):
+        applied, conflicts = await review_queue.commit(list(self.decisions.values()))
+        self.decisions.clear()
+
+        approved = sum(1 for _, decision in applied if decision['status'] == "approved")
+        notice = f"✅ Approved {approved}, ❌ denied {len(applied) - approved}."
+        if conflicts:
+            notice += f"\n⚠️ Skipped {len(conflicts)} already reviewed or changed: " + ", ".join(f"#{i}" for i in conflicts[:20])
+
+        embed = await self.render()
+        if not self.shown:
+            self.stop()
+            await interaction.response.edit_message(content=f"{notice}\nAll suggestions processed!", embed=None, view=None)
+            return
+        await interaction.response.edit_message(embed=embed, view=self)
+        await interaction.followup.send(notice, ephemeral=True)
+
+    @discord.ui.button(label="Stop", style=discord.ButtonStyle.secondary, row=2)
+    async def stop_review(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.stop()
+        await interaction.message.delete()
 
 class SuggestCommands(commands.Cog):
     def __init__(self, bot):
@@ -269,17 +309,7 @@ class SuggestCommands(commands.Cog):
         app_commands.Choice(name="R", value="r")
     ])
     async def suggest(self, interaction: discord.Interaction, text: str, type: app_commands.Choice[str], rating: app_commands.Choice[str]):
-        suggestions = load_suggestions()
-        suggestion = {
-            "text": text,
-            "type": type.value,
-            "rating": rating.value,
-            "user_id": interaction.user.id,
-            "username": interaction.user.name,
-            "id": len(suggestions) + 1
-        }
-        suggestions.append(suggestion)
-        save_suggestions(suggestions)
+        await add_suggestion(text, type.value, rating.value, interaction.user.id, interaction.user.name)
         
         await interaction.response.send_message("✅ Suggestion submitted for review!", ephemeral=True)
 
@@ -287,12 +317,11 @@ class SuggestCommands(commands.Cog):
     @app_commands.default_permissions(administrator=True)
     async def approve_cycle(self, interaction: discord.Interaction):
         # Check Authorization
-        AUTHORIZED_USER_ID = 1467691908506583132
         if interaction.user.id != AUTHORIZED_USER_ID:
             await interaction.response.send_message("⛔ You are not authorized to use this command.", ephemeral=True)
             return
 
-        suggestions = load_suggestions()
+        suggestions = await review_queue.pending()
         if not suggestions:
             await interaction.response.send_message("No pending suggestions.", ephemeral=True)
             return
@@ -301,9 +330,23 @@ class SuggestCommands(commands.Cog):
         index = 0
         sg = suggestions[index]
         
-        embed = build_suggestion_embed(sg, index, len(suggestions))
+        embed = await build_suggestion_embed(sg, index, len(suggestions))
         
-        view = SuggestionView(index, interaction.user.id)
+        view = SuggestionView(sg['id'], interaction.user.id)
+        await interaction.response.send_message(embed=embed, view=view)
+
+    @app_commands.command(name="approve-bulk", description="Approve or deny many suggestions at once (Authorized users only)")
+    @app_commands.default_permissions(administrator=True)
+    async def approve_bulk(self, interaction: discord.Interaction):
+        if interaction.user.id != AUTHORIZED_USER_ID:
+            await interaction.response.send_message("⛔ You are not authorized to use this command.", ephemeral=True)
+            return
+
+        view = BulkReviewView(interaction.user.id)
+        embed = await view.render()
+        if not view.shown:
+            await interaction.response.send_message("No pending suggestions.", ephemeral=True)
+            return
         await interaction.response.send_message(embed=embed, view=view)
 
 async def setup(bot):
@@ -1,67 +1,138 @@
 import discord
 from discord.ext import commands
 import os
+import sys
+import time
 import asyncio
+from utils.server_config import init_config
+from utils.question_loader import reload_store, questions_watcher
+from utils.sqlite_backend import get_backend, ChangeWatcher
+from utils.storage import flusher
+from utils.suggestion_manager import suggestion_log
+from utils.message_edits import message_edits
+from utils.metrics import loop_lag, metrics_server
+from utils.command_sync import sync_if_changed
+from utils.cluster import HealthReporter
+
+# For the "ready in N s" log line
+STARTED_AT = time.perf_counter()
 
 # WARNING: Hardcoded token for testing purposes only
 # In production, use environment variables or a secure secrets manager
 TOKEN = 'PUT_YOUR_TICKLISH_BOT_TOKEN_HERE'
 
+# Guild that gets commands synced instantly
+TEST_GUILD_ID = 1467699708221980872
+
 # Setup Intent
 intents = discord.Intents.default()
 # intents.message_content = True # Not strictly needed for slash commands but good practice
 
-class TickleBot(commands.Bot):
-    def __init__(self):
+class TickleBot(commands.AutoShardedBot):
+    def __init__(self, force_sync=False, shard_ids=None, shard_count=None, cluster_id=None, health_queue=None):
+        # With no shard arguments discord.py picks the recommended shard count
+        # and runs every shard in this process
         super().__init__(
             command_prefix="!",
             intents=intents,
-            help_command=None # Disable default help command
+            help_command=None, # Disable default help command
+            shard_ids=shard_ids,
+            shard_count=shard_count
         )
+        # Sync commands at startup even if they look unchanged
+        self.force_sync = force_sync
+        self._ready_logged = False
+        # Set when run as a worker by cluster.py
+        self.cluster_id = cluster_id
+        self.health_reporter = HealthReporter(self, health_queue) if health_queue is not None else None
+        self.db_watcher = None
 
     async def setup_hook(self):
+        # Warm the in-memory caches so the first interaction doesn't hit disk
+        await init_config()
+        await reload_store()
+        await suggestion_log.load()
+        
+        loop_lag.start()
+        await metrics_server.start()
+        
+        backend = get_backend()
+        if backend:
+            # Other cluster workers write to the same database; reload what they change
+            self.db_watcher = ChangeWatcher(backend)
+            self.db_watcher.on("questions", reload_store)
+            self.db_watcher.on("config", init_config)
+            await self.db_watcher.start()
+        else:
+            # Pick up edits to questions.json without a restart
+            questions_watcher.start()
+        
+        if self.health_reporter:
+            self.health_reporter.start()
+        
         # Load cogs
         await self.load_extension("cogs.game_commands")
         await self.load_extension("cogs.admin_commands")
         await self.load_extension("cogs.info_commands")
         await self.load_extension("cogs.suggest_commands")
         
-        # Sync slash commands
+        # Sync slash commands, skipping scopes whose commands haven't changed.
+        # In a cluster only the first worker syncs; the tree is the same everywhere.
+        if not self.cluster_id:
+            await self.sync_commands(force=self.force_sync)
+
+    async def sync_commands(self, force=False):
+        """
+        Syncs the command tree to the test guild (instant) and globally (which
+        also clears old /tickle-* globals). Each scope is only uploaded when
+        its fingerprint differs from the last sync, or when `force` is set.
+        """
+        results = {}
         try:
-            guild_id = discord.Object(id=1467699708221980872)
-            
-            # 1. Clear global commands (removes duplicates if they were previously synced globally)
-            # We don't need to explicitly clear if we don't sync global. 
-            # But if there ARE old global commands cached, we might want to wipe them.
-            # To wipe global commands: self.tree.clear_commands(guild=None) then sync() ?? 
-            # Actually, simply running sync() with an empty tree would wipe them, but our tree is NOT empty.
-            # So we can't easily wipe global without unregistering cogs first.
-            
-            # The most common cause of duplicates is having Global + Guild commands.
-            # We are copying global -> guild. So we have them as Guild commands.
-            # If we also have them as Global commands, they show up twice.
-            # To fix, we can just sync the guild. The global ones will eventually disappear if we never sync global again? 
-            # No, they stay until overwritten.
-            
-            # Strategy: Sync BOTH to ensure consistency and remove old global commands.
-            # This might take up to an hour for global updates to propagate, but it cleans up the 'tickle-*' commands.
+            guild_id = discord.Object(id=TEST_GUILD_ID)
             
             # 1. Sync to Test Guild (Instant update for you)
             self.tree.copy_global_to(guild=guild_id)
-            synced_guild = await self.tree.sync(guild=guild_id)
-            print(f"Synced {len(synced_guild)} command(s) to guild {guild_id.id}")
+            synced_guild = await sync_if_changed(self.tree, guild=guild_id, force=force)
+            if synced_guild is None:
+                print(f"Guild {guild_id.id} commands unchanged, skipping sync")
+            else:
+                print(f"Synced {len(synced_guild)} command(s) to guild {guild_id.id}")
+            results["guild"] = synced_guild
             
             # 2. Sync Globally (Removes old /tickle-* commands from the global list)
-            print("Syncing global commands... (this may take a moment)")
-            synced_global = await self.tree.sync() 
-            print(f"Synced {len(synced_global)} global command(s).")
+            synced_global = await sync_if_changed(self.tree, force=force)
+            if synced_global is None:
+                print("Global commands unchanged, skipping sync")
+            else:
+                print(f"Synced {len(synced_global)} global command(s).")
+            results["global"] = synced_global
             
         except Exception as e:
             print(f"Failed to sync commands: {e}")
+        return results
+
+    async def close(self):
+        questions_watcher.stop()
+        if self.db_watcher:
+            self.db_watcher.stop()
+        if self.health_reporter:
+            self.health_reporter.stop()
+        loop_lag.stop()
+        await metrics_server.stop()
+        # Let queued button removals go out before the connection closes
+        await message_edits.drain()
+        # Write out any changes still waiting in the flush window
+        await flusher.flush_all()
+        await super().close()
 
     async def on_ready(self):
         print(f'{self.user} has connected to Discord!')
         print(f'Logged in as {self.user.name} (ID: {self.user.id})')
+        if not self._ready_logged:
+            self._ready_logged = True
+            cluster = f" (cluster {self.cluster_id}, shards {sorted(self.shards)})" if self.cluster_id is not None else ""
+            print(f"Ready {time.perf_counter() - STARTED_AT:.2f}s after startup{cluster}")
         # Setting status to reference the owner
         await self.change_presence(activity=discord.Activity(type=discord.ActivityType.watching, name="over the tickle master"))
 
@@ -103,7 +174,8 @@ def main():
         print("ERROR: You must replace 'YOUR_BOT_TOKEN_HERE' in main.py with your actual bot token!")
         return
 
-    bot = TickleBot()
+    # python main.py --force-sync re-uploads slash commands even if unchanged
+    bot = TickleBot(force_sync="--force-sync" in sys.argv[1:])
     try:
         bot.run(TOKEN)
     except Exception as e:
@@ -0,0 +1,70 @@
+import asyncio
+import multiprocessing
+import os
+import socket
+import sys
+import unittest
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import cluster
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def serve_worker_metrics(metrics_port, started, stop):
+    # Same order as cluster.run_worker: configure, then load the bot modules
+    cluster.configure_worker(metrics_port)
+    import main  # noqa: F401
+    from utils.metrics import metrics_server
+
+    async def serve():
+        await metrics_server.start()
+        started.put(metrics_server.port)
+        while not stop.is_set():
+            await asyncio.sleep(0.05)
+        await metrics_server.stop()
+
+    asyncio.run(serve())
+
+class WorkerMetricsPortTest(unittest.TestCase):
+    def test_each_worker_serves_its_own_port(self):
+        ctx = multiprocessing.get_context("spawn")
+        base = _free_port()
+        ports = [base + 1, base + 2]
+        started = ctx.Queue()
+        stop = ctx.Event()
+
+        # Workers inherit the launcher's environment, which must not win
+        previous = os.environ.get("TICKLE_METRICS_PORT")
+        os.environ["TICKLE_METRICS_PORT"] = str(base)
+        try:
+            workers = [ctx.Process(target=serve_worker_metrics, args=(port, started, stop)) for port in ports]
+            for worker in workers:
+                worker.start()
+        finally:
+            if previous is None:
+                del os.environ["TICKLE_METRICS_PORT"]
+            else:
+                os.environ["TICKLE_METRICS_PORT"] = previous
+
+        try:
+            reported = sorted(started.get(timeout=60) for _ in workers)
+            self.assertEqual(reported, ports)
+            for port in ports:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as resp:
+                    self.assertEqual(resp.status, 200)
+        finally:
+            stop.set()
+            for worker in workers:
+                worker.join(timeout=10)
+                if worker.is_alive():
+                    worker.terminate()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import asyncio
+import os
+import time
+
+from utils.metrics import loop_lag
+
+# Seconds between health reports from each worker
+HEALTH_INTERVAL = 10.0
+
+def shard_ranges(shard_count, processes):
+    """
+    Splits shards 0..shard_count-1 into `processes` contiguous ranges, as
+    even as possible. Empty ranges are dropped.
+    """
+    processes = max(1, min(processes, shard_count))
+    base, extra = divmod(shard_count, processes)
+    ranges = []
+    start = 0
+    for i in range(processes):
+        size = base + (1 if i < extra else 0)
+        ranges.append(list(range(start, start + size)))
+        start += size
+    return ranges
+
+def shard_health(bot):
+    """
+    Returns a JSON-friendly health snapshot of this process and its shards.
+    """
+    guilds_per_shard = {}
+    for guild in bot.guilds:
+        guilds_per_shard[guild.shard_id] = guilds_per_shard.get(guild.shard_id, 0) + 1
+
+    shards = {}
+    for shard_id, shard in bot.shards.items():
+        latency = shard.latency
+        shards[shard_id] = {
+            "connected": not shard.is_closed(),
+            "latency_ms": round(latency * 1000, 1) if latency == latency and latency != float("inf") else None,
+            "guilds": guilds_per_shard.get(shard_id, 0),
+        }
+
+    return {
+        "cluster": bot.cluster_id,
+        "pid": os.getpid(),
+        "time": time.time(),
+        "ready": bot.is_ready(),
+        "guilds": len(bot.guilds),
+        "loop_lag_ms": round(loop_lag.last.value * 1000, 2),
+        "shards": shards,
+    }
+
+class HealthReporter:
+    """
+    Sends shard_health() to the launcher every HEALTH_INTERVAL seconds over a
+    multiprocessing queue.
+    """
+
+    def __init__(self, bot, queue, interval=HEALTH_INTERVAL):
+        self.bot = bot
+        self.queue = queue
+        self.interval = interval
+        self._task = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                self.queue.put_nowait(shard_health(self.bot))
+            except Exception as e:
+                # A full or closed queue must never take the bot down
+                print(f"Could not report health: {e}")
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,42 @@
+import hashlib
+import json
+
+from utils.storage import run_io, read_json_or_quarantine, write_json_sync
+
+# Fingerprint of the last command tree synced to each scope
+SYNC_STATE_FILE = 'data/command_sync.json'
+
+def tree_fingerprint(tree, guild=None):
+    """
+    Returns a stable hash of the command payloads `tree.sync(guild=guild)`
+    would upload.
+    """
+    payload = sorted(
+        (command.to_dict(tree) for command in tree.get_commands(guild=guild)),
+        key=lambda c: (c.get("type", 1), c["name"])
+    )
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+def _scope_key(tree, guild):
+    scope = f"guild:{guild.id}" if guild else "global"
+    return f"{tree.client.application_id}:{scope}"
+
+async def sync_if_changed(tree, guild=None, force=False):
+    """
+    Syncs the tree to `guild` (or globally) only if its fingerprint differs
+    from the one recorded after the last successful sync.
+
+    Returns:
+        list: The synced commands, or None if the sync was skipped.
+    """
+    fingerprint = tree_fingerprint(tree, guild)
+    key = _scope_key(tree, guild)
+    state = await run_io(read_json_or_quarantine, SYNC_STATE_FILE, default={}) or {}
+    if not force and state.get(key) == fingerprint:
+        return None
+
+    synced = await tree.sync(guild=guild)
+    state[key] = fingerprint
+    await run_io(write_json_sync, SYNC_STATE_FILE, state, indent=4)
+    return synced
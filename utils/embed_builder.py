@@ -1,12 +1,21 @@
 import discord
-import datetime
+from collections import OrderedDict
+
+from utils.question_loader import get_store
+
+# Indexed by rating code (see utils.question_loader.RATING_CODES)
+RATING_COLORS = [discord.Color.green(), discord.Color.gold(), discord.Color.red()]
+DEFAULT_COLOR = discord.Color.blue()
+
+# Pre-rendered question embeds kept by EmbedTemplates
+EMBED_CACHE_SIZE = 4096
 
 def get_rating_color(rating):
     """
     Returns the discord.Color associated with a content rating.
     """
     if not rating:
-        return discord.Color.blue()
+        return DEFAULT_COLOR
         
     rating = rating.lower()
     if rating == 'pg':
@@ -16,35 +25,80 @@ def get_rating_color(rating):
     elif rating == 'r':
         return discord.Color.red()
     else:
-        return discord.Color.blue()
+        return DEFAULT_COLOR
+
+def get_rating_code_color(rating_code):
+    """
+    Returns the discord.Color for a rating code without any string handling.
+    """
+    if rating_code < len(RATING_COLORS):
+        return RATING_COLORS[rating_code]
+    return DEFAULT_COLOR
+
+class EmbedTemplates:
+    """
+    LRU cache of the parts of a question embed that never change: description,
+    color and footer text. Requestor and timestamp are added per message.
 
-def build_question_embed(question_data, type_str, requestor=None):
+    Entries are keyed by question identity and dropped wholesale when the
+    question store is reloaded.
+    """
+
+    def __init__(self, max_size=EMBED_CACHE_SIZE):
+        self.max_size = max_size
+        self._templates = OrderedDict()
+        self._store = None
+
+    def __len__(self):
+        return len(self._templates)
+
+    def get(self, question, type_str):
+        store = get_store()
+        if store is not self._store:
+            self._templates.clear()
+            self._store = store
+
+        key = (question.category, question.id, type_str)
+        entry = self._templates.get(key)
+        # Other packs can reuse an ID, so make sure it's the same question
+        if entry is not None and entry[0] == question.text and entry[1] == question.rating_code:
+            self._templates.move_to_end(key)
+            return entry[2]
+
+        template = _render_template(question, type_str)
+        self._templates[key] = (question.text, question.rating_code, template)
+        if len(self._templates) > self.max_size:
+            self._templates.popitem(last=False)
+        return template
+
+def _render_template(question, type_str):
+    rating = question.rating or 'Unknown'
+    q_id = question.id if question.id is not None else 'Unknown'
+    footer = f"Type: {type_str.upper()} | Rating: {rating.upper()} | ID: {q_id}"
+    return (question.text, get_rating_code_color(question.rating_code), footer)
+
+embed_templates = EmbedTemplates()
+
+def build_question_embed(question, type_str, requestor=None):
     """
     Builds a discord.Embed for a question or dare.
     
     Args:
-        question_data (dict): The question object from JSON.
+        question (Question): The question drawn from the store.
         type_str (str): 'Truth' or 'Dare' (display text).
         requestor (discord.User | discord.Member, optional): The user who requested the question.
         
     Returns:
         discord.Embed: The formatted embed.
     """
-    text = question_data.get('question') if 'question' in question_data else question_data.get('dare')
-    rating = question_data.get('rating', 'Unknown')
-    q_id = question_data.get('id', 'Unknown')
-    
-    embed = discord.Embed(
-        description=text,
-        color=get_rating_color(rating),
-        timestamp=datetime.datetime.utcnow()
-    )
+    description, color, footer = embed_templates.get(question, type_str)
+    # Plain constructor: Embed.from_dict()/copy() cost more than building anew
+    embed = discord.Embed(description=description, color=color, timestamp=discord.utils.utcnow())
+    embed.set_footer(text=footer)
     
     if requestor:
         embed.set_author(name=f"Requested by {requestor.display_name}", icon_url=requestor.display_avatar.url)
     else:
         embed.title = f"🪶 Tickle {type_str}"
     
-    embed.set_footer(text=f"Type: {type_str.upper()} | Rating: {rating.upper()} | ID: {q_id}")
-    
     return embed
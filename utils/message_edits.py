@@ -0,0 +1,102 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+import discord
+
+from utils.rate_limiter import BucketTable, RateLimit
+
+# Discord allows about 5 message edits per 5 seconds per channel
+CHANNEL_EDIT_LIMIT = RateLimit(5, 5.0)
+
+# Edits sent concurrently per batch
+EDIT_BATCH_SIZE = 8
+
+class MessageEditQueue:
+    """
+    Fire-and-forget message edits, applied by one background task.
+
+    Edits for the same message are coalesced (last one wins), each batch is
+    sent concurrently, and a per-channel token bucket keeps a busy channel
+    under Discord's edit limit instead of queueing 429 retries inside
+    discord.py. Failures are ignored: these edits are cosmetic.
+    """
+
+    def __init__(self, channel_limit=CHANNEL_EDIT_LIMIT, batch_size=EDIT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self._channels = BucketTable(channel_limit)
+        # message id -> (message, edit kwargs), oldest first
+        self._pending = OrderedDict()
+        self._wakeup = None
+        self._task = None
+        # True while a batch is being sent
+        self._busy = False
+
+    def __len__(self):
+        return len(self._pending)
+
+    def submit(self, message, **kwargs):
+        """
+        Queues `message.edit(**kwargs)` and returns immediately.
+        """
+        if message is None:
+            return
+        self._pending[message.id] = (message, kwargs)
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._pending:
+                batch, wait = self._next_batch()
+                if batch:
+                    self._busy = True
+                    try:
+                        await asyncio.gather(*(self._edit(message, kwargs) for message, kwargs in batch))
+                    finally:
+                        self._busy = False
+                else:
+                    await asyncio.sleep(wait)
+
+    def _next_batch(self):
+        now = time.monotonic()
+        self._channels.expire(now)
+        batch = []
+        wait = None
+        for message_id, (message, kwargs) in list(self._pending.items()):
+            channel_id = message.channel.id
+            retry_after = self._channels.retry_after(channel_id, now)
+            if retry_after > 0:
+                wait = retry_after if wait is None else min(wait, retry_after)
+                continue
+            self._channels.consume(channel_id, now)
+            batch.append((message, kwargs))
+            del self._pending[message_id]
+            if len(batch) >= self.batch_size:
+                break
+        return batch, wait
+
+    @staticmethod
+    async def _edit(message, kwargs):
+        try:
+            await message.edit(**kwargs)
+        except discord.HTTPException:
+            pass # Deleted, no access, or view already gone
+
+    async def drain(self, timeout=5.0):
+        """
+        Waits up to `timeout` seconds for queued edits, then stops the worker.
+        """
+        deadline = time.monotonic() + timeout
+        while (self._pending or self._busy) and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+message_edits = MessageEditQueue()
@@ -0,0 +1,287 @@
+"""
+In-process metrics: latency histograms, counters, event-loop lag, and a
+Prometheus text endpoint served from the bot's own event loop.
+
+    from utils.metrics import metrics
+
+    @metrics.timed("tickle_command_seconds", command="start_game")
+    async def start_game(...): ...
+
+    metrics.counter("tickle_no_questions_total", source="start_game").inc()
+
+The endpoint is off unless TICKLE_METRICS_PORT is set; it binds to
+127.0.0.1 (override with TICKLE_METRICS_HOST) and serves GET /metrics.
+"""
+import asyncio
+import functools
+import os
+import time
+
+# Histogram resolution: 2**SUB_BUCKET_BITS buckets per power of two, so any
+# recorded value is reported within 1/2**SUB_BUCKET_BITS (12.5%) of itself
+SUB_BUCKET_BITS = 3
+_SUB = 1 << SUB_BUCKET_BITS
+
+# Values are kept in microseconds; 256 buckets reach well past an hour
+_BUCKETS = 256
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+# How often the event loop is checked for lag
+LOOP_LAG_INTERVAL = 0.5
+
+DEFAULT_METRICS_HOST = "127.0.0.1"
+
+def _bucket_index(us):
+    if us < 2 * _SUB:
+        return us
+    shift = us.bit_length() - SUB_BUCKET_BITS - 1
+    return min(_BUCKETS - 1, (shift + 1) * _SUB + (us >> shift) - _SUB)
+
+def _bucket_midpoint(index):
+    if index < 2 * _SUB:
+        return index + 0.5
+    shift = index // _SUB - 1
+    lower = (index % _SUB + _SUB) << shift
+    return lower + (1 << shift) / 2
+
+class Histogram:
+    """
+    HDR-style log-linear histogram of durations in seconds. Recording is a
+    couple of integer operations and a list increment; memory is fixed.
+    """
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self):
+        self.counts = [0] * _BUCKETS
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        if seconds < 0:
+            seconds = 0.0
+        self.counts[_bucket_index(int(seconds * 1_000_000))] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        """
+        Returns the value (seconds) at quantile `q`, or 0.0 if empty.
+        """
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= target:
+                return min(_bucket_midpoint(index) / 1_000_000, self.max)
+        return self.max
+
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+class Gauge:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value):
+        self.value = value
+
+def _format_labels(labels, extra=None):
+    items = list(labels)
+    if extra:
+        items.append(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+class MetricsRegistry:
+    """
+    Named metric families, each split by label values.
+    """
+
+    _TYPES = {Histogram: "summary", Counter: "counter", Gauge: "gauge"}
+
+    def __init__(self):
+        # name -> (metric class, help text, {label tuple: metric})
+        self._families = {}
+
+    def _get(self, cls, name, help_text, labels):
+        family = self._families.get(name)
+        if family is None:
+            family = self._families[name] = (cls, help_text, {})
+        key = tuple(sorted(labels.items()))
+        metric = family[2].get(key)
+        if metric is None:
+            metric = family[2][key] = cls()
+        return metric
+
+    def histogram(self, name, help_text="", **labels):
+        return self._get(Histogram, name, help_text, labels)
+
+    def counter(self, name, help_text="", **labels):
+        return self._get(Counter, name, help_text, labels)
+
+    def gauge(self, name, help_text="", **labels):
+        return self._get(Gauge, name, help_text, labels)
+
+    def timed(self, name, help_text="", **labels):
+        """
+        Decorator recording each call's duration into a histogram. Works on
+        both plain and async functions.
+        """
+        def decorator(func):
+            histogram = self.histogram(name, help_text, **labels)
+
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    started = time.perf_counter()
+                    try:
+                        return await func(*args, **kwargs)
+                    finally:
+                        histogram.observe(time.perf_counter() - started)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - started)
+            return wrapper
+        return decorator
+
+    def families(self):
+        """
+        Yields (name, metric class, {label tuple: metric}) in name order.
+        """
+        for name in sorted(self._families):
+            cls, _, metrics = self._families[name]
+            yield name, cls, metrics
+
+    def render_prometheus(self):
+        """
+        Returns every metric in the Prometheus text exposition format.
+        """
+        lines = []
+        for name in sorted(self._families):
+            cls, help_text, metrics = self._families[name]
+            if help_text:
+                lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {self._TYPES[cls]}")
+            for labels, metric in sorted(metrics.items()):
+                if cls is Histogram:
+                    for q in QUANTILES:
+                        lines.append(f"{name}{_format_labels(labels, ('quantile', q))} {metric.quantile(q):.6g}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {metric.sum:.6g}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {metric.count}")
+                else:
+                    lines.append(f"{name}{_format_labels(labels)} {metric.value:.6g}")
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+
+class LoopLagMonitor:
+    """
+    Sleeps LOOP_LAG_INTERVAL at a time and records how late each wakeup was;
+    anything that blocks the event loop shows up as lag.
+    """
+
+    def __init__(self, interval=LOOP_LAG_INTERVAL):
+        self.interval = interval
+        self.histogram = metrics.histogram(
+            "tickle_event_loop_lag_seconds", "Delay between a scheduled and actual event loop wakeup")
+        self.last = metrics.gauge("tickle_event_loop_lag_last_seconds", "Most recent event loop lag sample")
+        self._task = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = time.perf_counter() - started - self.interval
+            self.histogram.observe(lag)
+            self.last.set(max(lag, 0.0))
+
+loop_lag = LoopLagMonitor()
+
+class MetricsServer:
+    """
+    Minimal HTTP server answering GET /metrics on the bot's event loop.
+
+    A host or port left as None is read from TICKLE_METRICS_HOST /
+    TICKLE_METRICS_PORT when the server starts, not at import, so a process
+    can still pick its own port after importing this module. Port 0 is off.
+    """
+
+    def __init__(self, host=None, port=None):
+        self.host = host
+        self.port = port
+        self._server = None
+
+    async def start(self):
+        if self.host is None:
+            self.host = os.environ.get("TICKLE_METRICS_HOST", DEFAULT_METRICS_HOST)
+        if self.port is None:
+            self.port = int(os.environ.get("TICKLE_METRICS_PORT", "0") or 0)
+        if not self.port or self._server is not None:
+            return
+        try:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        except OSError as e:
+            print(f"Could not serve metrics on {self.host}:{self.port}: {e}")
+            return
+        print(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader, writer):
+        try:
+            request = await asyncio.wait_for(reader.readline(), timeout=5)
+            # Drain the headers; the request body (if any) is ignored
+            while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                status, body = "200 OK", metrics.render_prometheus().encode()
+            else:
+                status, body = "404 Not Found", b"Not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+metrics_server = MetricsServer()
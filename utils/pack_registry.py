@@ -0,0 +1,197 @@
+import asyncio
+import os
+import re
+import time
+
+from utils.question_deck import decks
+from utils.question_loader import get_store, load_store_sync
+from utils.storage import run_io
+
+# Extra question packs live here as <name>.json and/or compiled <name>.pack
+PACKS_DIR = 'packs'
+
+# questions.json itself; always loaded, and the pack approvals are added to
+DEFAULT_PACK = 'default'
+
+# A loaded pack no guild has drawn from for this long is dropped from memory
+PACK_IDLE_SECONDS = 30 * 60
+
+# How often draws check for idle packs
+EVICT_INTERVAL = 60.0
+
+PACK_NAME = re.compile(r"^[a-z0-9_-]{1,32}$")
+
+class PackSource:
+    """
+    Where a pack's data lives on disk. Either path may be None.
+    """
+    __slots__ = ("name", "json_path", "pack_path")
+
+    def __init__(self, name, json_path=None, pack_path=None):
+        self.name = name
+        self.json_path = json_path
+        self.pack_path = pack_path
+
+def _scan_packs(directory):
+    sources = {}
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return sources
+    for entry in entries:
+        name, ext = os.path.splitext(entry.name)
+        name = name.lower()
+        if ext not in (".json", ".pack") or not PACK_NAME.match(name) or name == DEFAULT_PACK:
+            continue
+        source = sources.setdefault(name, PackSource(name))
+        if ext == ".json":
+            source.json_path = entry.path
+        else:
+            source.pack_path = entry.path
+    return sources
+
+class PackRegistry:
+    """
+    Knows every pack in PACKS_DIR but only keeps the ones guilds are playing.
+
+    Packs are loaded on first use (off the event loop) and dropped again after
+    PACK_IDLE_SECONDS without a draw, so memory follows the packs in use
+    rather than the packs on disk. The default pack is the process-wide store
+    from utils.question_loader and is never evicted.
+    """
+
+    def __init__(self, directory=PACKS_DIR, idle_seconds=PACK_IDLE_SECONDS):
+        self.directory = directory
+        self.idle_seconds = idle_seconds
+        self._sources = None
+        # name -> QuestionStore, for loaded extra packs
+        self._stores = {}
+        # name -> monotonic time of the last draw
+        self._last_used = {}
+        self._loading = {}
+        self._next_evict = 0.0
+
+    async def discover(self):
+        """
+        Re-scans PACKS_DIR for packs. Loaded packs are kept.
+        """
+        self._sources = await run_io(_scan_packs, self.directory)
+        return self.names()
+
+    async def refresh(self):
+        """
+        Re-scans PACKS_DIR and drops loaded packs so they reload on next use.
+        """
+        names = await self.discover()
+        decks.drop_stores(self._stores.values())
+        self._stores.clear()
+        self._last_used.clear()
+        return names
+
+    def names(self):
+        """
+        Returns every known pack name, default first.
+        """
+        return [DEFAULT_PACK] + sorted(self._sources or ())
+
+    def loaded(self):
+        return [DEFAULT_PACK] + sorted(self._stores)
+
+    def find_all(self, q_id, category=None):
+        """
+        Looks a question ID up in the default pack and the loaded packs.
+
+        Returns:
+            list: (pack name, Question) for every match, default pack first.
+        """
+        matches = []
+        for name, store in [(DEFAULT_PACK, get_store())] + sorted(self._stores.items()):
+            matches.extend((name, question) for question in store.find_all(q_id, category))
+        return matches
+
+    def ready(self, names):
+        """
+        Returns True if stores_for(names) can answer from memory, without
+        scanning PACKS_DIR or loading a pack.
+        """
+        if self._sources is None:
+            return False
+        return all(name == DEFAULT_PACK or name in self._stores or name not in self._sources for name in names)
+
+    def loaded_stores(self, names):
+        """
+        Returns (name, store) for the given packs that are already in memory.
+        Nothing is loaded and the packs' idle timers are left alone.
+        """
+        stores = []
+        for name in names:
+            store = get_store() if name == DEFAULT_PACK else self._stores.get(name)
+            if store is not None:
+                stores.append((name, store))
+        return stores
+
+    async def stores_for(self, names):
+        """
+        Returns the stores for the given pack names, loading any that are not
+        in memory. Unknown or unloadable packs are skipped; if none remain the
+        default pack is used.
+        """
+        if self._sources is None:
+            await self.refresh()
+
+        now = time.monotonic()
+        if now >= self._next_evict:
+            self._next_evict = now + EVICT_INTERVAL
+            self.evict_idle(now)
+
+        stores = []
+        for name in names:
+            if name == DEFAULT_PACK:
+                stores.append(get_store())
+                continue
+            store = self._stores.get(name)
+            if store is None:
+                store = await self._load(name)
+                if store is None:
+                    continue
+            self._last_used[name] = now
+            stores.append(store)
+        return stores or [get_store()]
+
+    async def _load(self, name):
+        source = self._sources.get(name)
+        if source is None:
+            return None
+        # Concurrent first draws share one load
+        task = self._loading.get(name)
+        if task is None:
+            task = self._loading[name] = asyncio.ensure_future(
+                run_io(load_store_sync, source.json_path, source.pack_path)
+            )
+        try:
+            store = await task
+        except (ValueError, IOError) as e:
+            print(f"Error loading question pack '{name}': {e}")
+            return None
+        finally:
+            self._loading.pop(name, None)
+        self._stores[name] = store
+        return store
+
+    def evict_idle(self, now=None):
+        """
+        Drops packs that have not been drawn from within idle_seconds, along
+        with the decks still drawing from them.
+        """
+        if now is None:
+            now = time.monotonic()
+        evicted = []
+        for name in [n for n, t in self._last_used.items() if now - t > self.idle_seconds]:
+            store = self._stores.pop(name, None)
+            if store is not None:
+                evicted.append(store)
+            del self._last_used[name]
+        if evicted:
+            decks.drop_stores(evicted)
+
+pack_registry = PackRegistry()
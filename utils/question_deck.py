@@ -0,0 +1,194 @@
+import random
+from bisect import bisect_right
+from collections import OrderedDict
+
+from utils.question_loader import get_store, CATEGORIES
+from utils.metrics import metrics
+
+# Upper bound on live decks; the least recently used channel is dropped first
+MAX_DECKS = 5000
+
+# A deck with more segments than this (many separate approvals) is rebuilt
+MAX_SEGMENTS = 64
+
+# category -> questions drawn since startup
+draw_counts = {
+    category: metrics.counter("tickle_draws_total", "Questions drawn since startup", category=category)
+    for category in CATEGORIES
+}
+
+class Deck:
+    """
+    A lazily shuffled permutation of positions into a question pool.
+
+    Each draw performs one step of Fisher-Yates on the remaining part of the
+    permutation, so nothing repeats until the pool is exhausted and no work is
+    spent shuffling cards that are never drawn. Only displaced positions are
+    stored (position -> card), so a deck costs memory per draw, not per card.
+
+    Cards are laid out as segments of the stores' (category, rating) buckets.
+    Rows later appended to a bucket become new segments at the end, still
+    undrawn this pass, so approving a question doesn't reset the deck; only
+    a reorder of a bucket it uses does (see follow()).
+    """
+    __slots__ = ("size", "swaps", "cursor", "stores", "covered", "starts", "segments", "last")
+
+    def __init__(self, stores, pools):
+        self.size = 0
+        self.swaps = {}
+        self.cursor = 0
+        self.stores = tuple(stores)
+        # pool key -> (bucket reorders, rows dealt into the deck)
+        self.covered = {}
+        # First card of each segment, and its (pool key, first bucket index)
+        self.starts = []
+        self.segments = []
+        self.last = None
+        for key, (rows, reorders) in pools.items():
+            self._extend(key, reorders, 0, len(rows))
+
+    def _extend(self, key, reorders, start, end):
+        segments = self.segments
+        # Rows right after the last segment's just lengthen it
+        if not (segments and segments[-1] == (key, start - (self.size - self.starts[-1]))):
+            self.starts.append(self.size)
+            segments.append((key, start))
+        self.size += end - start
+        self.covered[key] = (reorders, end)
+
+    def follow(self, stores, pools):
+        """
+        Deals in rows appended to the pools since the deck was built. Returns
+        False if the deck can't be kept: the stores changed, or a bucket had
+        rows swapped out of it, which moves the positions the deck refers to.
+        """
+        if len(self.stores) != len(stores):
+            return False
+        for mine, store in zip(self.stores, stores):
+            if mine is not store:
+                return False
+        grown = []
+        known = 0
+        for key, (rows, reorders) in pools.items():
+            covered = self.covered.get(key)
+            if covered is None:
+                grown.append((key, reorders, 0, len(rows)))
+                continue
+            known += 1
+            if covered[0] != reorders or covered[1] > len(rows):
+                return False
+            if covered[1] < len(rows):
+                grown.append((key, reorders, covered[1], len(rows)))
+        if known != len(self.covered) or len(self.segments) + len(grown) > MAX_SEGMENTS:
+            return False
+        for key, reorders, start, end in grown:
+            self._extend(key, reorders, start, end)
+        return True
+
+    def locate(self, card):
+        """
+        Returns (pool key, index into that pool's rows) for a card.
+        """
+        segment = bisect_right(self.starts, card) - 1
+        key, start = self.segments[segment]
+        return key, start + card - self.starts[segment]
+
+    def draw(self):
+        n = self.size
+        swaps = self.swaps
+        if self.cursor >= n:
+            # Pool exhausted: start a fresh pass
+            self.cursor = 0
+            swaps.clear()
+
+        c = self.cursor
+        if c == 0 and n > 1 and self.last is not None:
+            # Don't let a new pass open with the card that closed the last one
+            # (nothing is displaced yet, so position j holds card j)
+            j = random.randrange(n - 1)
+            if j >= self.last:
+                j += 1
+        else:
+            j = random.randrange(c, n)
+
+        card = swaps.pop(j, j)
+        if j != c:
+            swaps[j] = swaps.pop(c, c)
+        else:
+            swaps.pop(c, None)
+
+        self.cursor = c + 1
+        self.last = card
+        return card
+
+class DeckManager:
+    """
+    Holds one Deck per (guild, channel, category, rating set), with LRU eviction.
+    """
+
+    def __init__(self, max_decks=MAX_DECKS):
+        self.max_decks = max_decks
+        self._decks = OrderedDict()
+
+    def __len__(self):
+        return len(self._decks)
+
+    def drop_stores(self, stores):
+        """
+        Drops the decks that draw from any of `stores`, so unloaded packs
+        aren't kept in memory by channels that played them.
+        """
+        dropped = {id(store) for store in stores}
+        for key in [k for k, deck in self._decks.items() if any(id(s) in dropped for s in deck.stores)]:
+            del self._decks[key]
+
+    def draw(self, guild_id, channel_id, question_type, rating=None, allowed_ratings=None, stores=None):
+        """
+        Draws the next question from the channel's deck.
+
+        `stores` are the question packs to draw from (default: the main
+        store). The deck spans all of them, each pack keeping its own pools.
+
+        Returns:
+            Question: The question, or None if no matching question found.
+        """
+        if stores is None:
+            stores = [get_store()]
+        # (store index, category, rating code) -> (rows, bucket reorders)
+        pools = {}
+        for index, store in enumerate(stores):
+            for category, code, rows in store.select_pools(question_type, rating, allowed_ratings)[0]:
+                pools[(index, category, code)] = (rows, store.reorders(category, code))
+        if not pools:
+            return None
+
+        ratings_key = frozenset(allowed_ratings) if allowed_ratings is not None else None
+        key = (guild_id, channel_id, question_type, rating, ratings_key)
+
+        deck = self._decks.get(key)
+        if deck is None or not deck.follow(stores, pools):
+            deck = Deck(stores, pools)
+            self._decks[key] = deck
+            self._decks.move_to_end(key)
+            if len(self._decks) > self.max_decks:
+                self._decks.popitem(last=False)
+        else:
+            self._decks.move_to_end(key)
+
+        pool, i = deck.locate(deck.draw())
+        index, category, _ = pool
+        question = stores[index].question(category, pools[pool][0][i])
+        counter = draw_counts.get(question.category)
+        if counter is not None:
+            counter.inc()
+        return question
+
+decks = DeckManager()
+
+@metrics.timed("tickle_question_pick_seconds", "Time to pick a question", path="deck")
+def draw_question(guild_id, channel_id, question_type, rating=None, allowed_ratings=None, stores=None):
+    """
+    Draws a question from the per-channel deck, avoiding repeats until the
+    matching pool has been fully played through.
+    """
+    return decks.draw(guild_id, channel_id, question_type, rating, allowed_ratings, stores)
@@ -1,70 +1,747 @@
+import asyncio
 import json
 import random
 import os
+import sys
+import time
+import sqlite3
+from array import array
+from utils.storage import (
+    run_io, get_lock, read_lines_sync, append_lines_sync,
+    write_lines_sync, write_json_sync
+)
+from utils.sqlite_backend import get_backend
+from utils.question_pack import QuestionPack, OverlayColumn, PackIdIndex, compile_pack
+from utils.metrics import metrics
 
 QUESTIONS_FILE = 'questions.json'
 
-def load_questions():
+# Compiled form of QUESTIONS_FILE (see utils.question_pack); used instead of
+# the JSON file when it is at least as new
+PACK_FILE = 'questions.pack'
+
+# Edits to the main questions not yet folded into QUESTIONS_FILE (JSON storage
+# only; see QuestionJournal)
+QUESTIONS_DELTA_FILE = 'questions.delta.jsonl'
+
+# Fold the delta log into QUESTIONS_FILE once it holds this many records
+DELTA_COMPACT_THRESHOLD = 1000
+
+CATEGORIES = ["truths", "dares", "wyr", "nhie", "paranoia"]
+
+RATINGS = ["pg", "pg13", "r"]
+
+# Ratings are stored as small ints; these codes are fixed, anything else found
+# in a file is given the next free code by the store that loads it
+RATING_CODES = {rating: code for code, rating in enumerate(RATINGS)}
+
+# Rating code marking a removed row; such rows are in no bucket
+REMOVED_CODE = 255
+
+# Seconds between checks of questions.json for edits
+WATCH_INTERVAL = 5.0
+
+# Key holding the question text in questions.json, per category
+TEXT_KEYS = {category: "question" for category in CATEGORIES}
+TEXT_KEYS["dares"] = "dare"
+
+# Maps the singular game type used by commands/buttons to its JSON category key
+TYPE_TO_CATEGORY = {
+    "truth": "truths",
+    "dare": "dares",
+    "wyr": "wyr",
+    "nhie": "nhie",
+    "paranoia": "paranoia",
+}
+
+def load_questions(strict=False, path=QUESTIONS_FILE):
     """
-    Loads questions from the JSON file.
+    Loads questions from the JSON file (questions.json unless `path` is given).
     Returns a dictionary with 'truths' and 'dares' lists.
+    If `strict` is set, read and decode errors are raised instead of
+    returning empty lists.
     """
-    if not os.path.exists(QUESTIONS_FILE):
+    if not os.path.exists(path):
         return {"truths": [], "dares": []}
         
     try:
-        with open(QUESTIONS_FILE, 'r', encoding='utf-8') as f:
+        with open(path, 'r', encoding='utf-8') as f:
             data = json.load(f)
             
         # Basic validation to ensure keys exist
-        for key in ["truths", "dares", "wyr", "nhie", "paranoia"]:
+        for key in CATEGORIES:
             if key not in data:
                 data[key] = []
             
         return data
     except (json.JSONDecodeError, IOError) as e:
+        if strict:
+            raise
         print(f"Error loading questions: {e}")
         return {"truths": [], "dares": []}
 
-def get_random_question(question_type, rating=None, data=None, exclude_id=None):
+class Question:
+    """
+    A single question handed out by the store. Created on demand when a
+    question is drawn; the store itself keeps only parallel arrays.
+    """
+    __slots__ = ("category", "row", "id", "text", "rating_code", "rating")
+
+    def __init__(self, category, row, q_id, text, rating_code, rating):
+        self.category = category
+        self.row = row
+        self.id = q_id
+        self.text = text
+        self.rating_code = rating_code
+        self.rating = rating
+
+    def to_dict(self):
+        """
+        Returns the question in questions.json form.
+        """
+        return {"id": self.id, TEXT_KEYS[self.category]: self.text, "rating": self.rating}
+
+class CategoryTable:
+    """
+    Column storage for one category. Row numbers are the dense integer IDs
+    used everywhere inside the store.
+    """
+    __slots__ = ("ids", "texts", "ratings", "bucket_pos", "id_to_row", "removed")
+
+    def __init__(self):
+        self.ids = []
+        # Interned, so identical texts across reloads/packs share one object
+        self.texts = []
+        # Rating code per row
+        self.ratings = array('B')
+        # Position of each row inside its (category, rating) bucket
+        self.bucket_pos = array('I')
+        self.id_to_row = {}
+        # Rows removed at runtime; they keep their row number and ID
+        self.removed = 0
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_pack(cls, columns):
+        """
+        Builds a table over a pack's mapped columns. Rows added later go to
+        in-memory tails; nothing is copied out of the pack.
+        """
+        ids, texts, ratings, bucket_pos, id_sorted, _ = columns
+        table = cls()
+        table.ids = OverlayColumn(ids, [])
+        table.texts = OverlayColumn(texts, [])
+        table.ratings = OverlayColumn(ratings, array('B'))
+        table.bucket_pos = OverlayColumn(bucket_pos, array('I'))
+        table.id_to_row = PackIdIndex(ids, id_sorted)
+        return table
+
+def _copy_column(column):
+    # Lists and OverlayColumns have copy(); arrays copy by slicing
+    return column.copy() if hasattr(column, "copy") else column[:]
+
+class StoreSnapshot:
+    """
+    Cheap copy of a store's columns, turned back into questions.json form by
+    to_json() on the writer thread.
+    """
+
+    def __init__(self, store):
+        self.rating_names = list(store.rating_names)
+        self.columns = {
+            category: (_copy_column(table.ids), _copy_column(table.texts), _copy_column(table.ratings))
+            for category, table in store.tables.items()
+        }
+
+    def to_json(self):
+        data = {}
+        for category, (ids, texts, ratings) in self.columns.items():
+            text_key = TEXT_KEYS.get(category, "question")
+            data[category] = [
+                {"id": q_id, text_key: text, "rating": self.rating_names[code]}
+                for q_id, text, code in zip(ids, texts, ratings)
+                if code != REMOVED_CODE
+            ]
+        return data
+
+class QuestionStore:
+    """
+    Indexed, compact snapshot of the question data.
+
+    Each category is stored as parallel arrays (see CategoryTable) with
+    ratings as small-int codes. Row numbers are bucketed by (category, rating
+    code) once at build time, so picking a random question is a single random
+    index into a prebuilt array, and rating filters are integer comparisons.
+    """
+
+    def __init__(self, data):
+        # False when built as a placeholder for a file that failed to load,
+        # so it is never written back over the user's data
+        self.writable = True
+        # Seconds reload_store() spent reading and indexing this snapshot
+        self.build_seconds = 0.0
+        # Bumped on every in-place change so dependent caches can notice
+        self.version = 0
+        # Rating code -> name; unknown ratings found in the data get new codes
+        self.rating_names = list(RATINGS)
+        self._rating_codes = dict(RATING_CODES)
+        self.tables = {}
+        # (category, rating code) -> array of rows
+        self._buckets = {}
+        # (category, rating code) -> swap-removes from that bucket; rows
+        # appended to a bucket keep everyone else's positions, these don't
+        self._reorders = {}
+
+        for category in CATEGORIES:
+            table = self.tables[category] = CategoryTable()
+            for q in data.get(category, []):
+                text = q.get("question") or q.get("dare") or ""
+                self._append(category, table, q.get("id"), q.get("rating", ""), text)
+
+    @classmethod
+    def from_pack(cls, pack):
+        """
+        Builds a store directly on a memory-mapped QuestionPack.
+        """
+        store = cls({})
+        store.rating_names = list(pack.rating_names)
+        store._rating_codes = {name: code for code, name in enumerate(pack.rating_names)}
+        for category, columns in pack.columns.items():
+            store.tables[category] = CategoryTable.from_pack(columns)
+            for code, rows in columns[5].items():
+                store._buckets[(category, code)] = OverlayColumn(rows, array('I'))
+        return store
+
+    def _rating_code(self, rating):
+        rating = (rating or "").lower()
+        code = self._rating_codes.get(rating)
+        if code is None:
+            code = len(self.rating_names)
+            if code >= REMOVED_CODE:
+                raise ValueError("Too many distinct ratings")
+            self.rating_names.append(rating)
+            self._rating_codes[rating] = code
+        return code
+
+    def _append(self, category, table, q_id, rating, text):
+        code = self._rating_code(rating)
+        if isinstance(q_id, str):
+            q_id = sys.intern(q_id)
+        row = len(table.ids)
+        table.ids.append(q_id)
+        table.texts.append(sys.intern(text))
+        table.ratings.append(code)
+        table.id_to_row[q_id] = row
+
+        bucket = self._buckets.get((category, code))
+        if bucket is None:
+            bucket = self._buckets[(category, code)] = array('I')
+        table.bucket_pos.append(len(bucket))
+        bucket.append(row)
+        return row
+
+    def has_id(self, category, q_id):
+        """
+        True if `q_id` is taken in `category`, including by a removed question.
+        """
+        table = self.tables.get(category)
+        return table is not None and q_id in table.id_to_row
+
+    def find_all(self, q_id, category=None):
+        """
+        Returns every live question with this ID, in `category` only or in
+        every category. Older question files reuse some IDs across
+        categories, so there can be more than one.
+        """
+        matches = []
+        categories = (category,) if category else self.tables
+        for category in categories:
+            table = self.tables.get(category)
+            if table is None:
+                continue
+            row = table.id_to_row.get(q_id)
+            if row is not None and table.ratings[row] != REMOVED_CODE:
+                matches.append(self.question(category, row))
+        return matches
+
+    def find(self, q_id, category=None):
+        """
+        Looks a question up by ID through the per-category indexes.
+
+        Returns:
+            Question: The question, or None if there is none (or it was
+            removed), or if the ID is in several categories and `category`
+            wasn't given.
+        """
+        matches = self.find_all(q_id, category)
+        return matches[0] if len(matches) == 1 else None
+
+    def _make_writable(self, category, table):
+        # Pack-backed numeric columns are read-only maps; copy this
+        # category's into memory (a few bytes per row) before the first edit
+        if isinstance(table.ratings, OverlayColumn):
+            table.ratings = table.ratings.to_array('B')
+            table.bucket_pos = table.bucket_pos.to_array('I')
+            for key, rows in self._buckets.items():
+                if key[0] == category and isinstance(rows, OverlayColumn):
+                    self._buckets[key] = rows.to_array('I')
+
+    def _unbucket(self, category, table, row):
+        # Swap-remove: the bucket's last row takes this row's slot
+        key = (category, table.ratings[row])
+        bucket = self._buckets[key]
+        pos = table.bucket_pos[row]
+        last = bucket[len(bucket) - 1]
+        bucket[pos] = last
+        table.bucket_pos[last] = pos
+        bucket.pop()
+        self._reorders[key] = self._reorders.get(key, 0) + 1
+
+    def set_rating(self, category, q_id, rating):
+        """
+        Moves a question to another rating in place.
+
+        Returns:
+            Question: The updated question, or None if it doesn't exist.
+        """
+        question = self.find(q_id, category)
+        if question is None:
+            return None
+        code = self._rating_code(rating)
+        if code == question.rating_code:
+            return question
+        table = self.tables[category]
+        self._make_writable(category, table)
+        self._unbucket(category, table, question.row)
+        bucket = self._buckets.get((category, code))
+        if bucket is None:
+            bucket = self._buckets[(category, code)] = array('I')
+        table.ratings[question.row] = code
+        table.bucket_pos[question.row] = len(bucket)
+        bucket.append(question.row)
+        self.version += 1
+        return self.question(category, question.row)
+
+    def remove_question(self, category, q_id):
+        """
+        Takes a question out of play. Its ID stays reserved.
+
+        Returns:
+            Question: The removed question, or None if it doesn't exist.
+        """
+        question = self.find(q_id, category)
+        if question is None:
+            return None
+        table = self.tables[category]
+        self._make_writable(category, table)
+        self._unbucket(category, table, question.row)
+        table.ratings[question.row] = REMOVED_CODE
+        table.removed += 1
+        self.version += 1
+        return question
+
+    def apply_edit(self, record):
+        """
+        Applies one delta record (see QuestionJournal). Records that are
+        already reflected in the store are no-ops, so replaying is safe.
+        """
+        op = record.get("op")
+        category = record.get("category")
+        if op == "add":
+            if not self.has_id(category, record["id"]):
+                self.add_question(category, record["id"], record["rating"], record["text"])
+        elif op == "rerate":
+            self.set_rating(category, record["id"], record["rating"])
+        elif op == "remove":
+            self.remove_question(category, record["id"])
+
+    def add_question(self, category, q_id, rating, text):
+        """
+        Adds a single question to the index without rebuilding it.
+
+        Returns:
+            Question: The added question.
+        """
+        table = self.tables.setdefault(category, CategoryTable())
+        row = self._append(category, table, q_id, rating, text)
+        self.version += 1
+        return self.question(category, row)
+
+    def question(self, category, row):
+        table = self.tables[category]
+        code = table.ratings[row]
+        return Question(category, row, table.ids[row], table.texts[row], code, self.rating_names[code])
+
+    def snapshot(self):
+        return StoreSnapshot(self)
+
+    def count(self, category, rating=None):
+        if rating is None:
+            table = self.tables.get(category)
+            return len(table) - table.removed if table is not None else 0
+        code = self._rating_codes.get(rating.lower())
+        return len(self._buckets.get((category, code), ()))
+
+    def rating_counts(self, category):
+        """
+        Returns {rating name: number of questions} for a category, read off
+        the buckets (kept current by in-place edits and rebuilt on reload).
+        """
+        counts = {}
+        for (bucket_category, code), rows in self._buckets.items():
+            if bucket_category == category and rows:
+                counts[self.rating_names[code]] = len(rows)
+        return counts
+
+    def get_random_question(self, question_type, rating=None, exclude_id=None,
+                            allowed_ratings=None, exclude_ids=None):
+        """
+        Same contract as the module-level get_random_question, minus `data`.
+        """
+        pools, total = self.select_pools(question_type, rating, allowed_ratings)
+        if not total:
+            return None
+
+        excluded = set(exclude_ids) if exclude_ids else set()
+        if exclude_id is not None:
+            excluded.add(exclude_id)
+
+        # Positions of excluded questions within the concatenated pools
+        skip = []
+        if excluded:
+            table = self.tables[pools[0][0]]
+            offset = 0
+            for category, code, rows in pools:
+                for q_id in excluded:
+                    row = table.id_to_row.get(q_id)
+                    if row is None:
+                        continue
+                    if code is None:
+                        skip.append(offset + row)
+                    elif table.ratings[row] == code:
+                        skip.append(offset + table.bucket_pos[row])
+                offset += len(rows)
+            # Only exclude if we still have other options
+            if len(skip) >= total:
+                skip = []
+            skip.sort()
+
+        # Uniform draw over the remaining slots, stepping over excluded ones
+        i = random.randrange(total - len(skip))
+        for pos in skip:
+            if i < pos:
+                break
+            i += 1
+
+        return self.pick(pools, i)
+
+    def select_pools(self, question_type, rating=None, allowed_ratings=None):
+        """
+        Resolves a type/rating filter to its non-empty buckets.
+
+        Returns:
+            tuple: (list of (category, rating code, rows) triples, total
+            number of questions). The code is None for the all-ratings pool.
+        """
+        category = TYPE_TO_CATEGORY.get(question_type, "truths")
+
+        if rating:
+            rating = rating.lower()
+            if allowed_ratings is not None and rating not in allowed_ratings:
+                return [], 0
+            codes = [self._rating_codes.get(rating)]
+        elif allowed_ratings is not None:
+            codes = sorted(self._rating_codes.get(r) for r in allowed_ratings if r in self._rating_codes)
+        else:
+            table = self.tables.get(category)
+            if not table:
+                return [], 0
+            if not table.removed:
+                return [(category, None, range(len(table)))], len(table)
+            # Removed rows are only left out of the buckets
+            codes = range(len(self.rating_names))
+
+        pools = []
+        total = 0
+        for code in codes:
+            rows = self._buckets.get((category, code))
+            if rows:
+                pools.append((category, code, rows))
+                total += len(rows)
+        return pools, total
+
+    def reorders(self, category, code):
+        """
+        Returns how often the (category, rating code) bucket has had rows
+        swapped out of it. Positions into a bucket stay valid while this
+        is unchanged, however many rows were appended.
+        """
+        return self._reorders.get((category, code), 0)
+
+    def pick(self, pools, i):
+        """
+        Returns the i-th question of the concatenated pools.
+        """
+        for category, code, rows in pools:
+            if i < len(rows):
+                return self.question(category, rows[i])
+            i -= len(rows)
+        return None
+
+_store = None
+_reload_lock = None
+
+def get_store():
+    """
+    Returns the process-wide QuestionStore, loading it on first use.
+    """
+    global _store
+    if _store is None:
+        _store = QuestionStore(load_questions())
+        _replay_edits(_store, QUESTIONS_DELTA_FILE)
+    return _store
+
+def _replay_edits(store, delta_path):
+    records, _ = read_lines_sync(delta_path)
+    for record in records:
+        store.apply_edit(record)
+    return len(records)
+
+def _pack_is_current(json_path=QUESTIONS_FILE, pack_path=PACK_FILE):
+    if not pack_path:
+        return False
+    try:
+        pack_mtime = os.stat(pack_path).st_mtime_ns
+    except OSError:
+        return False
+    try:
+        return pack_mtime >= os.stat(json_path).st_mtime_ns
+    except (OSError, TypeError):
+        return True
+
+def load_store_sync(json_path=QUESTIONS_FILE, pack_path=PACK_FILE, delta_path=None):
+    """
+    Builds a store from the compiled pack if it is up to date, otherwise from
+    the JSON file, then replays the edits logged in `delta_path` (if given).
+    Read and decode errors are raised.
+    """
+    if _pack_is_current(json_path, pack_path):
+        store = QuestionStore.from_pack(QuestionPack(pack_path))
+    else:
+        store = QuestionStore(load_questions(strict=True, path=json_path))
+    if delta_path:
+        _replay_edits(store, delta_path)
+    return store
+
+async def reload_store():
+    """
+    Re-reads the questions file and swaps in a freshly built store.
+    Parsing and indexing run off the event loop, and the swap is a single
+    reference assignment, so selections already holding the old store finish
+    on it undisturbed.
+
+    Raises:
+        The read/decode error, if a store is already loaded (it is kept).
+        On first load a read-only empty store is installed instead.
+    """
+    global _store, _reload_lock
+    if _reload_lock is None:
+        _reload_lock = asyncio.Lock()
+
+    async with _reload_lock:
+        backend = get_backend()
+        started = time.perf_counter()
+        try:
+            if backend:
+                data = await backend.load_questions()
+                for key in CATEGORIES:
+                    data.setdefault(key, [])
+                store = await run_io(QuestionStore, data)
+            else:
+                # An edit being logged right now must land before the log is replayed
+                async with get_lock(QUESTIONS_DELTA_FILE):
+                    store = await run_io(load_store_sync, delta_path=QUESTIONS_DELTA_FILE)
+        except (ValueError, IOError, sqlite3.Error) as e:
+            print(f"Error loading questions, keeping the current set: {e}")
+            if _store is not None:
+                raise
+            _store = QuestionStore({"truths": [], "dares": []})
+            _store.writable = False
+            return _store
+
+        store.build_seconds = time.perf_counter() - started
+        _store = store
+        return store
+
+def _file_signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+class QuestionsWatcher:
+    """
+    Polls questions.json (and its compiled pack) and reloads the store when
+    either changes.
+
+    Only os.stat() calls run on the event loop each tick; a changed
+    mtime/size/inode triggers reload_store(), which does the heavy lifting
+    in the I/O pool.
+    """
+
+    def __init__(self, paths=(QUESTIONS_FILE, PACK_FILE), interval=WATCH_INTERVAL):
+        self.paths = paths
+        self.interval = interval
+        self._signature = None
+        self._task = None
+
+    def _current_signature(self):
+        return tuple(_file_signature(path) for path in self.paths)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._signature = self._current_signature()
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            signature = self._current_signature()
+            if signature == self._signature or not any(signature):
+                continue
+            self._signature = signature
+            try:
+                store = await reload_store()
+                print(f"Reloaded questions in {store.build_seconds * 1000:.1f} ms")
+            except Exception:
+                pass # Already reported; keep serving the old store
+
+questions_watcher = QuestionsWatcher()
+
+class QuestionJournal:
+    """
+    Append-only JSON-lines log of edits to the main questions, used with JSON
+    storage so an edit costs one small append instead of a rewrite of
+    questions.json (and a recompile of its pack):
+
+        {"op": "add", "category": ..., "id": ..., "rating": ..., "text": ...}
+        {"op": "rerate", "category": ..., "id": ..., "rating": ...}
+        {"op": "remove", "category": ..., "id": ...}
+
+    Loading the store replays the log on top of the file or pack. Replaying
+    is idempotent, so once the log passes DELTA_COMPACT_THRESHOLD records it
+    is folded in by rewriting questions.json (and the pack, if there is one)
+    first and truncating the log second. Compaction rebuilds from what is on
+    disk rather than from the live store, so records can be appended before
+    they are applied in memory.
+    """
+
+    def __init__(self, path=QUESTIONS_DELTA_FILE, threshold=DELTA_COMPACT_THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        self._count = None
+
+    async def append(self, records):
+        async with get_lock(self.path):
+            if self._count is None:
+                self._count = len((await run_io(read_lines_sync, self.path))[0])
+            await run_io(append_lines_sync, self.path, records)
+            self._count += len(records)
+            if self._count >= self.threshold:
+                try:
+                    await run_io(self._compact_sync)
+                except (ValueError, IOError) as e:
+                    # The records are safely in the log; compaction is retried on the next append
+                    print(f"Error compacting {self.path}: {e}")
+
+    def _compact_sync(self):
+        data = load_store_sync(QUESTIONS_FILE, PACK_FILE, self.path).snapshot().to_json()
+        write_json_sync(QUESTIONS_FILE, data, indent=2)
+        if os.path.exists(PACK_FILE):
+            compile_pack(data, PACK_FILE)
+        write_lines_sync(self.path, [])
+        self._count = 0
+
+question_journal = QuestionJournal()
+
+async def save_question_edits(records):
+    """
+    Persists edits already applied to the main store: one SQLite transaction,
+    or one append to the delta log.
+    """
+    backend = get_backend()
+    if backend:
+        await backend.apply_question_edits(records)
+    else:
+        await question_journal.append(records)
+
+async def rerate_question(q_id, rating, category=None):
+    """
+    Changes a main-store question's rating and persists the change.
+
+    Returns:
+        Question: The updated question, or None if the ID wasn't found (or
+        is in several categories and `category` wasn't given).
+    """
+    store = get_store()
+    question = store.find(q_id, category)
+    if question is None or not store.writable:
+        return None
+    question = store.set_rating(question.category, q_id, rating)
+    await save_question_edits([{"op": "rerate", "category": question.category, "id": q_id, "rating": question.rating}])
+    return question
+
+async def remove_question(q_id, category=None):
+    """
+    Removes a main-store question from play and persists the removal.
+
+    Returns:
+        Question: The removed question, or None if the ID wasn't found (or
+        is in several categories and `category` wasn't given).
+    """
+    store = get_store()
+    question = store.find(q_id, category)
+    if question is None or not store.writable:
+        return None
+    store.remove_question(question.category, q_id)
+    await save_question_edits([{"op": "remove", "category": question.category, "id": q_id}])
+    return question
+
+@metrics.timed("tickle_question_pick_seconds", "Time to pick a question", path="get_random_question")
+def get_random_question(question_type, rating=None, data=None, exclude_id=None,
+                        allowed_ratings=None, exclude_ids=None):
     """
     Gets a random question based on type and optional rating.
     
+    Draws uniformly from every question matching the rating filter in one step,
+    so callers never need to retry.
+    
     Args:
         question_type (str): 'truth' or 'dare'
         rating (str, optional): 'pg', 'pg13', or 'r'. If None, any rating.
-        data (dict, optional): The data dictionary. If None, loads from file.
+        data (dict, optional): The data dictionary. If None, uses the cached store.
         exclude_id (int, optional): The ID of the question to exclude (prevent repeats).
+        allowed_ratings (iterable, optional): Ratings the result may have. If None, any rating.
+        exclude_ids (iterable, optional): Further IDs to exclude.
         
     Returns:
-        dict: The question object, or None if no matching question found.
+        Question: The question, or None if no matching question found.
     """
-    if data is None:
-        data = load_questions()
-        
-    keyword = "truths"
-    if question_type == "dare":
-        keyword = "dares"
-    elif question_type == "wyr":
-        keyword = "wyr"
-    elif question_type == "nhie":
-        keyword = "nhie"
-    elif question_type == "paranoia":
-        keyword = "paranoia"
-        
-    pool = data.get(keyword, [])
-    
-    if rating:
-        pool = [q for q in pool if q.get("rating", "").lower() == rating.lower()]
-    
-    # Filter out the excluded ID if provided, but only if we have other options
-    if exclude_id is not None and len(pool) > 1:
-        pool = [q for q in pool if q.get("id") != exclude_id]
-    
-    if not pool:
-        return None
-        
-    return random.choice(pool)
+    store = get_store() if data is None else QuestionStore(data)
+    return store.get_random_question(
+        question_type, rating,
+        exclude_id=exclude_id,
+        allowed_ratings=allowed_ratings,
+        exclude_ids=exclude_ids
+    )
 
 def validate_question_structure(data):
     """
@@ -0,0 +1,299 @@
+"""
+Precompiled binary question packs.
+
+A pack holds the same data as questions.json in a layout that can be
+memory-mapped and used in place: per-category columns, per-(category, rating)
+row tables and a UTF-8 string heap. Loading one only parses the small header;
+question text is decoded when a question is actually drawn, and several bot
+processes on one host share the mapped pages.
+
+    python -m utils.question_pack compile questions.json questions.pack
+
+Layout (little-endian, every section 8-byte aligned):
+
+    header   "TKPK", u16 version, u16 rating count, then per rating u8 len + name,
+             u16 category count, then per category:
+                 u8 len + name, u32 rows,
+                 u64 offsets of: id offsets, text offsets, ratings,
+                     bucket positions, id-sorted rows
+                 u16 bucket count, per bucket: u8 rating code, u32 rows, u64 offset
+    sections u64[rows + 1] id/text offsets into the heap, u8[rows] rating codes,
+             u32[rows] position of each row in its bucket, u32[rows] rows sorted
+             by id, u32[n] rows of each bucket
+    heap     UTF-8 ids and texts
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+from array import array
+
+MAGIC = b"TKPK"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sHH")
+_CATEGORY = struct.Struct("<I5QH")
+_BUCKET = struct.Struct("<BIQ")
+
+def _align(n):
+    return (n + 7) & ~7
+
+def compile_pack(data, out_path):
+    """
+    Writes questions.json-style `data` to `out_path` as a binary pack.
+
+    Returns:
+        int: Number of questions written.
+    """
+    from utils.question_loader import CATEGORIES, RATINGS, RATING_CODES
+
+    rating_names = list(RATINGS)
+    rating_codes = dict(RATING_CODES)
+
+    # Column data per category, before offsets are known
+    categories = []
+    for category in CATEGORIES:
+        ids, texts, codes = [], [], array('B')
+        for q in data.get(category, []):
+            rating = (q.get("rating") or "").lower()
+            if rating not in rating_codes:
+                rating_codes[rating] = len(rating_names)
+                rating_names.append(rating)
+            ids.append(str(q.get("id")).encode('utf-8'))
+            texts.append((q.get("question") or q.get("dare") or "").encode('utf-8'))
+            codes.append(rating_codes[rating])
+
+        buckets = {}
+        bucket_pos = array('I')
+        for row, code in enumerate(codes):
+            rows = buckets.setdefault(code, array('I'))
+            bucket_pos.append(len(rows))
+            rows.append(row)
+        id_sorted = array('I', sorted(range(len(ids)), key=ids.__getitem__))
+        categories.append((category, ids, texts, codes, bucket_pos, id_sorted, buckets))
+
+    # Header size doesn't depend on the offsets it holds
+    header_len = _HEADER.size + sum(1 + len(r.encode()) for r in rating_names) + 2
+    for category, *_, buckets in categories:
+        header_len += 1 + len(category.encode()) + _CATEGORY.size + _BUCKET.size * len(buckets)
+
+    body = bytearray()
+    base = _align(header_len)
+
+    def section(raw):
+        body.extend(b"\0" * (_align(len(body)) - len(body)))
+        offset = base + len(body)
+        body.extend(raw)
+        return offset
+
+    # Reserve the column sections first, then append the heap after them
+    layouts = []
+    for category, ids, texts, codes, bucket_pos, id_sorted, buckets in categories:
+        n = len(ids)
+        layout = {
+            "ids": section(bytes(8 * (n + 1))),
+            "texts": section(bytes(8 * (n + 1))),
+            "ratings": section(codes.tobytes()),
+            "bucket_pos": section(bucket_pos.tobytes()),
+            "id_sorted": section(id_sorted.tobytes()),
+            "buckets": [(code, len(rows), section(rows.tobytes())) for code, rows in sorted(buckets.items())],
+        }
+        layouts.append(layout)
+
+    for (category, ids, texts, *_), layout in zip(categories, layouts):
+        for column in ("ids", "texts"):
+            strings = ids if column == "ids" else texts
+            offsets = array('Q')
+            offsets.append(base + len(body))
+            for raw in strings:
+                body.extend(raw)
+                offsets.append(base + len(body))
+            start = layout[column] - base
+            body[start:start + len(offsets) * 8] = offsets.tobytes()
+
+    header = bytearray(_HEADER.pack(MAGIC, VERSION, len(rating_names)))
+    for name in rating_names:
+        raw = name.encode()
+        header += bytes([len(raw)]) + raw
+    header += struct.pack("<H", len(categories))
+    for (category, ids, *_), layout in zip(categories, layouts):
+        raw = category.encode()
+        header += bytes([len(raw)]) + raw
+        header += _CATEGORY.pack(
+            len(ids), layout["ids"], layout["texts"], layout["ratings"],
+            layout["bucket_pos"], layout["id_sorted"], len(layout["buckets"])
+        )
+        for code, count, offset in layout["buckets"]:
+            header += _BUCKET.pack(code, count, offset)
+    header += b"\0" * (base - len(header))
+
+    # Never rewrite a pack in place: running bots may have it mapped
+    tmp_path = f"{out_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(body)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, out_path)
+    return sum(len(c[1]) for c in categories)
+
+class _StringColumn:
+    """
+    Read-only view of a string column; each access decodes one string.
+    """
+    __slots__ = ("_mm", "_offsets")
+
+    def __init__(self, mm, offsets):
+        self._mm = mm
+        self._offsets = offsets
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        return self._mm[self._offsets[i]:self._offsets[i + 1]].decode('utf-8')
+
+    def raw(self, i):
+        return self._mm[self._offsets[i]:self._offsets[i + 1]]
+
+class OverlayColumn:
+    """
+    A read-only pack column plus an in-memory tail for rows added at runtime.
+    """
+    __slots__ = ("_base", "_n", "_extra")
+
+    def __init__(self, base, extra):
+        self._base = base
+        self._n = len(base)
+        self._extra = extra
+
+    def __len__(self):
+        return self._n + len(self._extra)
+
+    def __getitem__(self, i):
+        if i < self._n:
+            return self._base[i]
+        return self._extra[i - self._n]
+
+    def __iter__(self):
+        for i in range(self._n):
+            yield self._base[i]
+        yield from self._extra
+
+    def append(self, value):
+        self._extra.append(value)
+
+    def copy(self):
+        return OverlayColumn(self._base, self._extra[:])
+
+    def to_array(self, typecode):
+        """
+        Returns a writable in-memory copy of a numeric column.
+        """
+        column = array(typecode)
+        column.frombytes(self._base.tobytes())
+        column.extend(self._extra)
+        return column
+
+class PackIdIndex:
+    """
+    id -> row lookups by binary search over the pack's id-sorted rows, plus a
+    dict for rows added at runtime. Nothing is built at load time.
+    """
+    __slots__ = ("_ids", "_sorted", "_extra")
+
+    def __init__(self, ids, id_sorted):
+        self._ids = ids
+        self._sorted = id_sorted
+        self._extra = {}
+
+    def get(self, q_id, default=None):
+        row = self._extra.get(q_id)
+        if row is not None:
+            return row
+        key = str(q_id).encode('utf-8')
+        lo, hi = 0, len(self._sorted)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            row = self._sorted[mid]
+            found = self._ids.raw(row)
+            if found < key:
+                lo = mid + 1
+            elif found > key:
+                hi = mid
+            else:
+                return row
+        return default
+
+    def __contains__(self, q_id):
+        return self.get(q_id) is not None
+
+    def __setitem__(self, q_id, row):
+        self._extra[q_id] = row
+
+class QuestionPack:
+    """
+    A memory-mapped pack. Only the header is parsed on open.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        mm = self._mm
+        view = memoryview(mm)
+
+        magic, version, n_ratings = _HEADER.unpack_from(mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} question pack")
+        pos = _HEADER.size
+
+        self.rating_names = []
+        for _ in range(n_ratings):
+            length = mm[pos]
+            self.rating_names.append(mm[pos + 1:pos + 1 + length].decode())
+            pos += 1 + length
+
+        (n_categories,) = struct.unpack_from("<H", mm, pos)
+        pos += 2
+
+        # category -> (ids, texts, ratings, bucket_pos, id_sorted, {code: rows})
+        self.columns = {}
+        for _ in range(n_categories):
+            length = mm[pos]
+            category = mm[pos + 1:pos + 1 + length].decode()
+            pos += 1 + length
+            rows, ids_off, texts_off, ratings_off, pos_off, sorted_off, n_buckets = _CATEGORY.unpack_from(mm, pos)
+            pos += _CATEGORY.size
+
+            buckets = {}
+            for _ in range(n_buckets):
+                code, count, offset = _BUCKET.unpack_from(mm, pos)
+                pos += _BUCKET.size
+                buckets[code] = view[offset:offset + 4 * count].cast('I')
+
+            self.columns[category] = (
+                _StringColumn(mm, view[ids_off:ids_off + 8 * (rows + 1)].cast('Q')),
+                _StringColumn(mm, view[texts_off:texts_off + 8 * (rows + 1)].cast('Q')),
+                view[ratings_off:ratings_off + rows],
+                view[pos_off:pos_off + 4 * rows].cast('I'),
+                view[sorted_off:sorted_off + 4 * rows].cast('I'),
+                buckets,
+            )
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile questions.json into a binary question pack.")
+    sub = parser.add_subparsers(dest="action", required=True)
+    compile_cmd = sub.add_parser("compile")
+    compile_cmd.add_argument("source", help="questions.json-style file")
+    compile_cmd.add_argument("output", help="pack file to write")
+    args = parser.parse_args()
+
+    with open(args.source, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    count = compile_pack(data, args.output)
+    print(f"Compiled {count} questions into {args.output}")
+
+if __name__ == "__main__":
+    main()
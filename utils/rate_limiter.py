@@ -0,0 +1,113 @@
+import heapq
+import time
+
+class RateLimit:
+    """
+    Allows bursts of up to `capacity` uses, refilling at `capacity` per `per` seconds.
+    """
+    __slots__ = ("capacity", "per", "rate")
+
+    def __init__(self, capacity, per):
+        self.capacity = capacity
+        self.per = per
+        self.rate = capacity / per
+
+# Defaults: the old per-user cooldown (1 use per 2s), plus room for a busy
+# channel or guild without letting one of them monopolise the bot
+USER_LIMIT = RateLimit(1, 2.0)
+CHANNEL_LIMIT = RateLimit(10, 10.0)
+GUILD_LIMIT = RateLimit(30, 10.0)
+
+class BucketTable:
+    """
+    Token buckets for one scope (users, channels or guilds).
+
+    A bucket that has refilled completely is the same as no bucket, so each
+    one is dropped once it is full again. A heap ordered by refill time finds
+    those in O(log n) per bucket; memory is bounded by the keys active within
+    one refill period and nothing is ever cleared wholesale.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        # key -> [tokens, updated, full_at]
+        self._buckets = {}
+        # (full_at, key); entries whose full_at no longer matches are stale
+        self._expiry = []
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def expire(self, now):
+        expiry = self._expiry
+        buckets = self._buckets
+        while expiry and expiry[0][0] <= now:
+            full_at, key = heapq.heappop(expiry)
+            bucket = buckets.get(key)
+            if bucket is not None and bucket[2] == full_at:
+                del buckets[key]
+
+    def retry_after(self, key, now):
+        """
+        Returns 0.0 if `key` has a token available, otherwise the seconds until it will.
+        """
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return 0.0
+        tokens = min(self.limit.capacity, bucket[0] + (now - bucket[1]) * self.limit.rate)
+        if tokens >= 1:
+            return 0.0
+        return (1 - tokens) / self.limit.rate
+
+    def consume(self, key, now):
+        limit = self.limit
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            tokens = limit.capacity
+        else:
+            tokens = min(limit.capacity, bucket[0] + (now - bucket[1]) * limit.rate)
+        tokens -= 1
+        full_at = now + (limit.capacity - tokens) / limit.rate
+        self._buckets[key] = [tokens, now, full_at]
+        heapq.heappush(self._expiry, (full_at, key))
+
+class RateLimiter:
+    """
+    Per-user, per-channel and per-guild token buckets checked together: a use
+    is only counted if every scope allows it.
+    """
+
+    def __init__(self, user_limit=USER_LIMIT, channel_limit=CHANNEL_LIMIT, guild_limit=GUILD_LIMIT):
+        self.scopes = (
+            ("user", BucketTable(user_limit)),
+            ("channel", BucketTable(channel_limit)),
+            ("guild", BucketTable(guild_limit)),
+        )
+
+    def hit(self, user_id, channel_id=None, guild_id=None, now=None):
+        """
+        Records one use if allowed.
+
+        Returns:
+            tuple: None if the use is allowed, otherwise (scope, retry_after)
+            for the scope that is out of tokens, scope being "user",
+            "channel" or "guild".
+        """
+        if now is None:
+            now = time.monotonic()
+        keys = (user_id, channel_id, guild_id)
+
+        for (scope, table), key in zip(self.scopes, keys):
+            table.expire(now)
+            if key is None:
+                continue
+            wait = table.retry_after(key, now)
+            if wait > 0:
+                return scope, wait
+
+        for (_, table), key in zip(self.scopes, keys):
+            if key is not None:
+                table.consume(key, now)
+        return None
+
+rate_limiter = RateLimiter()
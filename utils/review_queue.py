@@ -0,0 +1,147 @@
+"""
+Suggestion review shared by the one-at-a-time /approve-cycle screens and the
+bulk /approve-bulk menu.
+
+Reviewers address suggestions by ID, which is never reused, so a decision
+made on a stale screen (another reviewer got there first, or a new /suggest
+shifted the list) is reported as a conflict rather than applied to the wrong
+entry. For SQLite a batch of decisions is one transaction that
+also inserts the approved questions. JSON storage appends the new questions
+to the delta log (see utils.question_loader.QuestionJournal) before the
+resolves go to the suggestion log, so a crash in between leaves approved
+suggestions pending rather than losing their questions.
+"""
+import asyncio
+import random
+import string
+
+from utils.question_loader import get_store, question_journal, TEXT_KEYS, TYPE_TO_CATEGORY
+from utils.similarity_index import sync_similarity_index
+from utils.sqlite_backend import get_backend
+from utils.suggestion_manager import suggestion_log
+
+# Discord allows at most 25 options in a select menu
+REVIEW_PAGE_SIZE = 25
+
+def new_question_id(store, category, taken=()):
+    """
+    Returns a random 7-character ID not used in any category or in `taken`,
+    so IDs can be looked up without naming the category.
+    """
+    while True:
+        q_id = ''.join(random.choices(string.ascii_lowercase + string.digits, k=7))
+        if q_id not in taken and not any(store.has_id(c, q_id) for c in store.tables):
+            return q_id
+
+class ReviewQueue:
+    def __init__(self, suggestions):
+        self.suggestions = suggestions
+        # Keeps the decisions checked in commit() applicable until they're resolved
+        self._lock = asyncio.Lock()
+
+    async def pending(self):
+        return await self.suggestions.pending()
+
+    async def position(self, suggestion_id):
+        """
+        Returns (suggestion, index, total) for a pending suggestion, or
+        (None, None, total) if it is no longer pending.
+        """
+        pending = await self.pending()
+        for index, sg in enumerate(pending):
+            if sg["id"] == suggestion_id:
+                return sg, index, len(pending)
+        return None, None, len(pending)
+
+    async def next_after(self, suggestion_id):
+        """
+        Returns (suggestion, index, total) for the first pending suggestion
+        after `suggestion_id`, wrapping to the oldest; suggestion is None if
+        nothing is pending.
+        """
+        pending = await self.pending()
+        if not pending:
+            return None, None, 0
+        for index, sg in enumerate(pending):
+            if sg["id"] > suggestion_id:
+                return sg, index, len(pending)
+        return pending[0], 0, len(pending)
+
+    async def page(self, page, size=REVIEW_PAGE_SIZE):
+        """
+        Returns (suggestions on the page, page number, page count), with the
+        page number clamped to the pages that exist.
+        """
+        pending = await self.pending()
+        page_count = max(1, -(-len(pending) // size))
+        page = min(max(page, 0), page_count - 1)
+        return pending[page * size:(page + 1) * size], page, page_count
+
+    async def commit(self, decisions):
+        """
+        Applies review decisions in one write.
+
+        Args:
+            decisions (list): Dicts with "id", "status" ("approved" or
+                "denied") and, for approvals, "rating".
+
+        Returns:
+            tuple: (list of (suggestion, decision) applied, list of IDs skipped
+            because they were already resolved)
+        """
+        async with self._lock:
+            store = get_store()
+            if any(d["status"] == "approved" for d in decisions) and not store.writable:
+                print("Error: questions file failed to load, not adding approved questions")
+                return [], [d["id"] for d in decisions]
+
+            # Build the approved questions up front so SQLite can insert them in
+            # the same transaction that resolves their suggestions
+            pending = {sg["id"]: sg for sg in await self.pending()}
+            taken = set()
+            batch = []
+            for decision in decisions:
+                decision = dict(decision)
+                sg = pending.get(decision["id"])
+                if decision["status"] == "approved" and sg is not None:
+                    category = TYPE_TO_CATEGORY.get(sg["type"], "truths")
+                    q_id = new_question_id(store, category, taken)
+                    taken.add(q_id)
+                    decision["question"] = (category, {
+                        "id": q_id, TEXT_KEYS[category]: sg["text"], "rating": decision["rating"].lower()
+                    })
+                batch.append(decision)
+
+            if not get_backend():
+                # Only decisions that will apply; the lock keeps them so until
+                # resolve_many. Their questions reach the delta log before the
+                # resolves reach the suggestion log, and the store only after
+                # both, so a failed write never leaves questions in memory
+                # that aren't on disk (replay skips IDs it already has).
+                batch = [d for d in batch if d["id"] in pending]
+                added = [_add_record(d, pending[d["id"]]) for d in batch if "question" in d]
+                if added:
+                    # The whole batch is one append to the delta log
+                    await question_journal.append(added)
+
+            resolved = {sg["id"]: sg for sg in await self.suggestions.resolve_many(batch)}
+            applied = [(resolved[d["id"]], d) for d in batch if d["id"] in resolved]
+
+            # The store is the source of truth, so new questions are playable
+            # right away. It may have been reloaded during the writes; adding
+            # is a no-op if the reload already replayed them.
+            store = get_store()
+            for sg, decision in applied:
+                if "question" in decision:
+                    store.apply_edit(_add_record(decision, sg))
+            sync_similarity_index()
+
+        conflicts = [d["id"] for d in decisions if d["id"] not in resolved]
+        return applied, conflicts
+
+def _add_record(decision, suggestion):
+    category, entry = decision["question"]
+    return {"op": "add", "category": category, "id": entry["id"],
+            "rating": entry["rating"], "text": suggestion["text"]}
+
+review_queue = ReviewQueue(suggestion_log)
@@ -1,70 +1,149 @@
-import json
-import os
+from utils.storage import run_io, read_json_or_quarantine, schedule_write
+from utils.sqlite_backend import get_backend
+from utils.metrics import metrics
 
 CONFIG_FILE = 'data/server_config.json'
 
+ALL_RATINGS = frozenset(["pg", "pg13", "r"])
+SAFE_RATINGS = frozenset(["pg", "pg13"])
+
+# Question packs a guild plays with until /setup picks others
+DEFAULT_PACKS = ("default",)
+
+# guild_id (str) -> {"main": ..., "nsfw": ..., "packs": [...]}, loaded from disk once
+_config = None
+
+# guild_id (int) -> ChannelPolicy, compiled from _config
+_policies = {}
+
+class ChannelPolicy:
+    """
+    A guild's channel config compiled for lookups on the interaction hot path.
+
+    `ratings` maps each allowed channel ID to the frozenset of ratings playable
+    there; any channel missing from it is denied with `denial`. `packs` are
+    the question packs the guild draws from.
+    """
+    __slots__ = ("ratings", "denial", "packs")
+
+    def __init__(self, main_id, nsfw_id=None, packs=None):
+        self.packs = tuple(packs) if packs else DEFAULT_PACKS
+        self.ratings = {}
+        if main_id:
+            # If NSFW channel is set, Main is restricted to PG/PG13
+            self.ratings[main_id] = SAFE_RATINGS if nsfw_id else ALL_RATINGS
+        if nsfw_id:
+            self.ratings[nsfw_id] = ALL_RATINGS
+
+        self.denial = f"⛔ Please play in <#{main_id}>"
+        if nsfw_id:
+            self.denial += f" or <#{nsfw_id}>"
+        self.denial += "!"
+
+def _compile_policies(config):
+    policies = {}
+    for guild_id, val in config.items():
+        # Backward compatibility: if it's an int, treat as main channel only
+        if isinstance(val, int):
+            policies[int(guild_id)] = ChannelPolicy(val)
+        elif val:
+            policies[int(guild_id)] = ChannelPolicy(val.get("main"), val.get("nsfw"), val.get("packs"))
+    return policies
+
+@metrics.timed("tickle_config_load_seconds", "load_config() calls, including the first read from disk")
 def load_config():
-    if not os.path.exists(CONFIG_FILE):
-        return {}
-    try:
-        with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except:
-        return {}
+    """
+    Returns the in-memory config, reading it from disk on first use only.
+    """
+    global _config, _policies
+    if _config is None:
+        _config = _read_config_file()
+        _policies = _compile_policies(_config)
+    return _config
 
-def save_config(config):
-    if not os.path.exists('data'):
-        os.makedirs('data')
-    with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-        json.dump(config, f, indent=4)
+async def init_config():
+    """
+    Loads the config from disk without blocking the event loop.
+    Called once at startup; later reads are served from memory.
+    """
+    global _config, _policies
+    backend = get_backend()
+    if backend:
+        config = await backend.load_config()
+    else:
+        config = await run_io(_read_config_file)
+    _config = config
+    _policies = _compile_policies(config)
+    return config
 
-def get_allowed_channel(guild_id):
+def _read_config_file():
+    backend = get_backend()
+    if backend:
+        return backend.load_config_sync()
+    return read_json_or_quarantine(CONFIG_FILE, default={})
+
+async def save_config(config):
     """
-    Returns a dict with 'main' and 'nsfw' keys, or None if not set.
-    Example: {'main': 123, 'nsfw': 456} or {'main': 123, 'nsfw': None}
+    Makes `config` the in-memory config and writes it through to disk.
+    """
+    global _config, _policies
+    _config = config
+    _policies = _compile_policies(config)
+    await _schedule_save()
+
+def _schedule_save():
+    # Bursts of changes are coalesced into one atomic write; the top level is
+    # snapshotted so later in-place updates can't race the writer thread
+    return schedule_write(CONFIG_FILE, lambda: dict(_config), indent=4)
+
+async def set_allowed_channels(guild_id, main_id, nsfw_id=None, packs=None):
+    """
+    Sets the guild's game channels. The guild keeps the packs it already
+    plays with unless `packs` is given.
     """
     config = load_config()
-    val = config.get(str(guild_id))
-    
-    if val is None:
-        return None
-        
-    # Backward compatibility: if it's an int, treat as main channel only
-    if isinstance(val, int):
-        return {"main": val, "nsfw": None}
-        
-    return val
-
-def set_allowed_channels(guild_id, main_id, nsfw_id=None):
-    config = load_config()
-    config[str(guild_id)] = {"main": main_id, "nsfw": nsfw_id}
-    save_config(config)
-
-def get_allowed_ratings(guild_id, channel_id, allowed_config=None):
-    """
-    Returns a list of allowed ratings (['pg', 'pg13', 'r']) for the given channel.
-    If no config is set, all ratings are allowed.
-    """
-    if allowed_config is None:
-        allowed_config = get_allowed_channel(guild_id)
-        
-    if not allowed_config:
-        return ["pg", "pg13", "r"]
-        
-    main_id = allowed_config.get("main")
-    nsfw_id = allowed_config.get("nsfw")
-    
-    # If channel matches NSFW channel, allow everything
-    if nsfw_id and channel_id == nsfw_id:
-        return ["pg", "pg13", "r"]
-        
-    # If channel matches Main channel
-    if main_id and channel_id == main_id:
-        # If NSFW channel is set, Main is restricted to PG/PG13
-        if nsfw_id:
-            return ["pg", "pg13"]
-        # If NO NSFW channel set, Main allows everything
-        return ["pg", "pg13", "r"]
-        
-    # If channel matches neither, allow nothing (should be blocked before this)
-    return []
+    if packs is None:
+        previous = config.get(str(guild_id))
+        packs = previous.get("packs") if isinstance(previous, dict) else None
+    entry = {"main": main_id, "nsfw": nsfw_id}
+    if packs:
+        entry["packs"] = list(packs)
+    config[str(guild_id)] = entry
+    _policies[int(guild_id)] = ChannelPolicy(main_id, nsfw_id, packs)
+    backend = get_backend()
+    if backend:
+        await backend.set_guild_config(guild_id, main_id, nsfw_id, packs)
+    else:
+        # The change is live in memory already; don't hold /setup for the debounce
+        _schedule_save()
+
+def get_channel_ratings(guild_id, channel_id):
+    """
+    Returns the frozenset of ratings allowed in the channel, or None if the
+    channel is not one of the guild's game channels.
+    Guilds without a config (and DMs, guild_id None) allow all ratings.
+    """
+    if _config is None:
+        load_config()
+    policy = _policies.get(guild_id)
+    if policy is None:
+        return ALL_RATINGS
+    return policy.ratings.get(channel_id)
+
+def get_guild_packs(guild_id):
+    """
+    Returns the names of the question packs the guild plays with.
+    """
+    if _config is None:
+        load_config()
+    policy = _policies.get(guild_id)
+    return policy.packs if policy else DEFAULT_PACKS
+
+def get_denial_message(guild_id):
+    """
+    Returns the cached "play in <#channel>" message for a guild.
+    """
+    if _config is None:
+        load_config()
+    policy = _policies.get(guild_id)
+    return policy.denial if policy else None
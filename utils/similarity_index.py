@@ -0,0 +1,302 @@
+import asyncio
+import difflib
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+from utils.question_loader import get_store, REMOVED_CODE, TYPE_TO_CATEGORY
+from utils.storage import run_io
+
+# Final similarity (difflib ratio) needed to report a duplicate
+DUPLICATE_THRESHOLD = 0.7
+
+# Looser trigram-overlap (Dice) cutoff used to pick candidates worth scoring
+CANDIDATE_THRESHOLD = 0.5
+
+# At most this many candidates get the exact difflib comparison
+MAX_CANDIDATES = 6
+
+# Results remembered per index, since review screens re-render the same suggestion
+RESULT_CACHE_SIZE = 256
+
+# Categories up to this size are searched exactly through trigram postings;
+# larger ones go through MinHash banding so lookup cost stays flat
+EXACT_SEARCH_LIMIT = 500
+
+# MinHash banding: BANDS keys of ROWS hashes each. Texts with trigram
+# Jaccard 0.6 share a key ~97% of the time, unrelated texts (~0.1) ~1.6%
+BANDS = 16
+ROWS = 3
+_SLOTS = BANDS * ROWS
+
+# Docs read per band key, and docs whose trigrams are recomputed per lookup
+BAND_BUCKET_CAP = 64
+MAX_BAND_CANDIDATES = 12
+
+def _normalize(text):
+    return " ".join(text.lower().split())
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+def _band_keys(grams):
+    # One-permutation MinHash: each trigram's hash picks a slot and the
+    # smallest hash per slot is kept, so a text is hashed in a single pass
+    signature = [None] * _SLOTS
+    for gram in grams:
+        h = hash(gram)
+        slot = h % _SLOTS
+        if signature[slot] is None or h < signature[slot]:
+            signature[slot] = h
+    keys = []
+    for band in range(BANDS):
+        rows = tuple(signature[band * ROWS:(band + 1) * ROWS])
+        # Bands left empty by short texts would match every other short text
+        if rows.count(None) < ROWS:
+            keys.append(hash((band,) + rows))
+    return keys
+
+def _dice(overlap, a, b):
+    return 2 * overlap / (a + b)
+
+class SimilarityIndex:
+    """
+    Trigram index over one question store, one per category.
+
+    Docs are the store's rows: texts are read back from the store and rows
+    it has removed (REMOVED_CODE) are skipped at lookup, so the index itself
+    is integer columns. Categories up to EXACT_SEARCH_LIMIT texts keep
+    trigram posting lists (trigrams mapped to small ints) and count exact
+    overlaps from them. Larger categories only keep their MinHash band keys
+    as one sorted column; a lookup reads a capped number of docs per key and
+    recomputes trigrams for the few that share the most keys. The best
+    survivors are scored with difflib, so reported percentages are on the
+    same scale as before.
+
+    The index covers `sizes[category]` rows when built; rows the store
+    gains later are indexed by catch_up().
+    """
+
+    def __init__(self, store, sizes):
+        self.store = store
+        # trigram -> small int, shared by all categories
+        self._gram_ids = {}
+        # category -> rows indexed so far
+        self._indexed = {}
+        # category -> gram id -> rows, for categories searched exactly
+        self._postings = {}
+        # category -> trigram count per row, alongside _postings
+        self._gram_counts = {}
+        # category -> (sorted band keys, row per key), from the build
+        self._bands = {}
+        # category -> band key -> rows, for rows indexed after the build
+        self._late_bands = {}
+        # (normalized text, category, limit) -> result of similar()
+        self._results = OrderedDict()
+
+        for category, size in sizes.items():
+            table = store.tables[category]
+            if size <= EXACT_SEARCH_LIMIT:
+                self._postings[category] = {}
+                self._gram_counts[category] = array('H')
+            keys = array('q')
+            rows = array('I')
+            for row, grams in self._rows(table, 0, size):
+                if category in self._postings:
+                    self._post(category, row, grams)
+                for key in _band_keys(grams):
+                    keys.append(key)
+                    rows.append(row)
+            # Stable sort, so each key's rows stay in row (age) order
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+            self._bands[category] = (array('q', map(keys.__getitem__, order)), array('I', map(rows.__getitem__, order)))
+            self._late_bands[category] = {}
+            self._indexed[category] = size
+
+    @staticmethod
+    def _rows(table, start, end):
+        texts, ratings = table.texts, table.ratings
+        for row in range(start, end):
+            text = texts[row]
+            if text and ratings[row] != REMOVED_CODE:
+                yield row, _trigrams(_normalize(text))
+
+    def _post(self, category, row, grams):
+        postings = self._postings[category]
+        counts = self._gram_counts[category]
+        # Rows without text (or removed when indexed) count no trigrams
+        counts.extend([0] * (row + 1 - len(counts)))
+        counts[row] = len(grams)
+        gram_ids = self._gram_ids
+        for gram in grams:
+            gram_id = gram_ids.get(gram)
+            if gram_id is None:
+                gram_id = gram_ids[gram] = len(gram_ids)
+            rows = postings.get(gram_id)
+            if rows is None:
+                rows = postings[gram_id] = array('I')
+            rows.append(row)
+
+    def catch_up(self):
+        """
+        Indexes rows the store has gained since they were last indexed.
+        """
+        for category, table in self.store.tables.items():
+            start = self._indexed.get(category, 0)
+            end = len(table)
+            if start >= end:
+                continue
+            if category not in self._bands:
+                self._bands[category] = (array('q'), array('I'))
+                self._late_bands[category] = {}
+                self._postings[category] = {}
+                self._gram_counts[category] = array('H')
+            late = self._late_bands[category]
+            for row, grams in self._rows(table, start, end):
+                if category in self._postings:
+                    self._post(category, row, grams)
+                for key in _band_keys(grams):
+                    late.setdefault(key, []).append(row)
+            self._indexed[category] = end
+            if end > EXACT_SEARCH_LIMIT and category in self._postings:
+                # Grown past exact search; the band keys take over
+                del self._postings[category]
+                del self._gram_counts[category]
+            self._results.clear()
+
+    def forget_results(self):
+        """
+        Drops cached results, e.g. after the store removed a question.
+        """
+        self._results.clear()
+
+    def similar(self, text, category, limit=3):
+        """
+        Returns up to `limit` (ratio, text) pairs for texts in `category`
+        with a difflib ratio of at least DUPLICATE_THRESHOLD, best first.
+        """
+        if not self._indexed.get(category):
+            return []
+
+        norm = _normalize(text)
+        key = (norm, category, limit)
+        cached = self._results.get(key)
+        if cached is not None:
+            self._results.move_to_end(key)
+            return cached
+
+        grams = _trigrams(norm)
+        if category in self._postings:
+            scored = self._exact_candidates(grams, category)
+        else:
+            scored = self._band_candidates(grams, category)
+        matches = self._score(norm, category, scored, limit)
+        self._results[key] = matches
+        if len(self._results) > RESULT_CACHE_SIZE:
+            self._results.popitem(last=False)
+        return matches
+
+    def _exact_candidates(self, grams, category):
+        postings = self._postings[category]
+        counts = self._gram_counts[category]
+        overlaps = {}
+        for gram in grams:
+            for row in postings.get(self._gram_ids.get(gram), ()):
+                overlaps[row] = overlaps.get(row, 0) + 1
+        n = len(grams)
+        return [(_dice(overlap, n, counts[row]), row) for row, overlap in overlaps.items()]
+
+    def _band_candidates(self, grams, category):
+        keys, rows = self._bands[category]
+        late = self._late_bands[category]
+        hits = {}
+        for key in _band_keys(grams):
+            lo = bisect_left(keys, key)
+            hi = bisect_right(keys, key, lo)
+            # Newest docs first; a key shared by that many docs says little anyway
+            for row in (rows[max(lo, hi - BAND_BUCKET_CAP):hi].tolist() + late.get(key, []))[-BAND_BUCKET_CAP:]:
+                hits[row] = hits.get(row, 0) + 1
+        # Docs sharing more band keys are the likelier near-duplicates
+        best = sorted(hits, key=hits.__getitem__, reverse=True)[:MAX_BAND_CANDIDATES]
+        texts = self.store.tables[category].texts
+        scored = []
+        for row in best:
+            doc_grams = _trigrams(_normalize(texts[row]))
+            scored.append((_dice(len(grams & doc_grams), len(grams), len(doc_grams)), row))
+        return scored
+
+    def _score(self, norm, category, scored, limit):
+        table = self.store.tables[category]
+        scored = [s for s in scored if s[0] >= CANDIDATE_THRESHOLD and table.ratings[s[1]] != REMOVED_CODE]
+        scored.sort(reverse=True)
+
+        matches = []
+        for _, row in scored[:MAX_CANDIDATES]:
+            doc_text = table.texts[row]
+            ratio = difflib.SequenceMatcher(None, norm, _normalize(doc_text)).ratio()
+            if ratio >= DUPLICATE_THRESHOLD:
+                matches.append((ratio, doc_text))
+        matches.sort(key=lambda m: m[0], reverse=True)
+        return matches[:limit]
+
+_index = None
+
+# (store, future) for the build in progress, shared by everyone waiting on it
+_building = None
+
+async def get_similarity_index():
+    """
+    Returns the index for the current question store, building it off the
+    event loop if the store has been reloaded since it was built. Concurrent
+    callers share one build, and questions added while it ran are indexed
+    before it is returned.
+    """
+    global _index, _building
+    store = get_store()
+    if _index is not None and _index.store is store:
+        return _index
+
+    if _building is None or _building[0] is not store:
+        # Row counts are taken here, on the loop; the thread only reads rows
+        # below them, which appends can't touch
+        sizes = {category: len(table) for category, table in store.tables.items()}
+        _building = (store, asyncio.ensure_future(run_io(SimilarityIndex, store, sizes)))
+    future = _building[1]
+    try:
+        index = await asyncio.shield(future)
+    finally:
+        if _building is not None and _building[1] is future and future.done():
+            _building = None
+
+    index.catch_up()
+    if index.store is get_store():
+        _index = index
+    return index
+
+def sync_similarity_index():
+    """
+    Indexes newly approved questions, if the index has been built. Ones
+    approved while a build runs are picked up when that build finishes.
+    """
+    if _index is not None and _index.store is get_store():
+        _index.catch_up()
+
+def remove_from_similarity_index(category, question):
+    """
+    Stops a removed question from being reported as a duplicate. The store's
+    removal is the tombstone; cached results that include it are dropped.
+    """
+    if _index is not None:
+        _index.forget_results()
+
+async def find_similar(text, question_type, limit=3):
+    """
+    Returns formatted "(NN%) text..." lines for likely duplicates of `text`.
+    """
+    index = await get_similarity_index()
+    category = TYPE_TO_CATEGORY.get(question_type.lower(), "truths")
+    return [
+        f"({int(ratio*100)}%) {q_text[:60]}..."
+        for ratio, q_text in index.similar(text, category, limit)
+    ]
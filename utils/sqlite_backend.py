@@ -0,0 +1,518 @@
+"""
+SQLite storage engine for questions, suggestions and guild config.
+
+Enabled by setting TICKLE_STORAGE=sqlite (see utils.storage.STORAGE_BACKEND).
+The JSON files stay the default; use this module's command line to move data
+between the two:
+
+    python -m utils.sqlite_backend import   # questions.json etc. -> data/tickle.db
+    python -m utils.sqlite_backend export   # data/tickle.db -> questions.json etc.
+
+It is also the storage for cluster mode (cluster.py): several bot processes
+share the database, and ChangeWatcher tells each of them when another one
+has changed the questions or guild config.
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from utils.storage import (
+    STORAGE_BACKEND, read_json_sync, write_json_sync, read_lines_sync, write_lines_sync
+)
+
+DATABASE_FILE = 'data/tickle.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    rowid    INTEGER PRIMARY KEY,
+    category TEXT NOT NULL,
+    rating   TEXT NOT NULL,
+    qid      TEXT NOT NULL,
+    text_key TEXT NOT NULL,
+    text     TEXT NOT NULL,
+    UNIQUE (category, qid)
+);
+CREATE INDEX IF NOT EXISTS questions_by_bucket ON questions (category, rating, rowid);
+
+CREATE TABLE IF NOT EXISTS suggestions (
+    id       INTEGER PRIMARY KEY AUTOINCREMENT,
+    text     TEXT NOT NULL,
+    type     TEXT NOT NULL,
+    rating   TEXT NOT NULL,
+    user_id  INTEGER,
+    username TEXT,
+    status   TEXT NOT NULL DEFAULT 'pending',
+    resolved_at REAL
+);
+CREATE INDEX IF NOT EXISTS suggestions_by_status ON suggestions (status, id);
+
+-- One row per kind of shared data, bumped in the same transaction as every
+-- write to it, so other processes can tell what to reload
+CREATE TABLE IF NOT EXISTS changes (
+    name    TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS guild_config (
+    guild_id TEXT PRIMARY KEY,
+    main_id  INTEGER,
+    nsfw_id  INTEGER,
+    packs    TEXT
+);
+"""
+
+def _migrate(conn):
+    # Databases created before per-guild question packs lack the column
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(guild_config)")]
+    if "packs" not in columns:
+        conn.execute("ALTER TABLE guild_config ADD COLUMN packs TEXT")
+
+def _guild_entry(row):
+    entry = {"main": row["main_id"], "nsfw": row["nsfw_id"]}
+    if row["packs"]:
+        entry["packs"] = row["packs"].split(",")
+    return entry
+
+# How often ChangeWatcher polls the changes table
+CHANGE_POLL_INTERVAL = 2.0
+
+def _bump(conn, name):
+    """
+    Increments the change version of `name`; call inside the write's transaction.
+
+    Returns:
+        int: The new version.
+    """
+    conn.execute(
+        "INSERT INTO changes (name, version) VALUES (?, 1) "
+        "ON CONFLICT (name) DO UPDATE SET version = version + 1",
+        (name,)
+    )
+    return conn.execute("SELECT version FROM changes WHERE name = ?", (name,)).fetchone()[0]
+
+class SqliteBackend:
+    """
+    Owns one connection in WAL mode. Every query runs on a single dedicated
+    worker thread, which keeps the connection thread-bound and the event loop
+    free.
+    """
+
+    def __init__(self, path=DATABASE_FILE):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tickle-sqlite")
+        self._conn = None
+        # name -> change version produced by this process's latest write
+        self.written = {}
+
+    def _connect(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            _migrate(conn)
+            self._conn = conn
+        return self._conn
+
+    async def run(self, func, *args):
+        """
+        Runs `func(conn, *args)` on the database thread.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(self.run_sync, func, *args))
+
+    def run_sync(self, func, *args):
+        return func(self._connect(), *args)
+
+    # Questions
+
+    @staticmethod
+    def _load_questions(conn):
+        data = {}
+        # Walks questions_by_bucket, so each category comes back grouped by rating
+        for row in conn.execute(
+            "SELECT category, rating, qid, text_key, text FROM questions "
+            "ORDER BY category, rating, rowid"
+        ):
+            data.setdefault(row["category"], []).append({
+                "id": row["qid"],
+                "rating": row["rating"],
+                row["text_key"]: row["text"]
+            })
+        return data
+
+    @staticmethod
+    def _apply_question_edits(conn, records):
+        """
+        Applies edit records in utils.question_loader.QuestionJournal form in
+        one transaction.
+
+        Returns:
+            int: The new "questions" change version.
+        """
+        with conn:
+            for record in records:
+                op = record["op"]
+                if op == "add":
+                    text_key = "dare" if record["category"] == "dares" else "question"
+                    conn.execute(
+                        "INSERT OR IGNORE INTO questions (category, rating, qid, text_key, text) VALUES (?, ?, ?, ?, ?)",
+                        (record["category"], record["rating"], record["id"], text_key, record["text"])
+                    )
+                elif op == "rerate":
+                    conn.execute(
+                        "UPDATE questions SET rating = ? WHERE category = ? AND qid = ?",
+                        (record["rating"], record["category"], record["id"])
+                    )
+                elif op == "remove":
+                    conn.execute(
+                        "DELETE FROM questions WHERE category = ? AND qid = ?",
+                        (record["category"], record["id"])
+                    )
+            return _bump(conn, "questions")
+
+    async def load_questions(self):
+        """
+        Returns every question in the same shape as questions.json.
+        """
+        return await self.run(self._load_questions)
+
+    async def apply_question_edits(self, records):
+        self.written["questions"] = await self.run(self._apply_question_edits, records)
+
+    # Suggestions
+
+    @staticmethod
+    def _pending_suggestions(conn):
+        rows = conn.execute(
+            "SELECT id, text, type, rating, user_id, username FROM suggestions "
+            "WHERE status = 'pending' ORDER BY id"
+        )
+        return [dict(row) for row in rows]
+
+    @staticmethod
+    def _count_pending(conn):
+        return conn.execute("SELECT COUNT(*) FROM suggestions WHERE status = 'pending'").fetchone()[0]
+
+    @staticmethod
+    def _get_suggestion(conn, suggestion_id):
+        row = conn.execute(
+            "SELECT id, text, type, rating, user_id, username FROM suggestions "
+            "WHERE id = ? AND status = 'pending'",
+            (suggestion_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    @staticmethod
+    def _add_suggestion(conn, suggestion):
+        with conn:
+            cur = conn.execute(
+                "INSERT INTO suggestions (text, type, rating, user_id, username) VALUES (?, ?, ?, ?, ?)",
+                (suggestion["text"], suggestion["type"], suggestion["rating"],
+                 suggestion["user_id"], suggestion["username"])
+            )
+        return cur.lastrowid
+
+    @staticmethod
+    def _resolve_suggestions(conn, decisions):
+        """
+        Resolves suggestions and inserts the questions approved with them in
+        one transaction. A decision only applies if its suggestion is still
+        pending.
+
+        Returns:
+            tuple: (suggestions resolved, new "questions" change version or None)
+        """
+        resolved = []
+        inserted = False
+        now = time.time()
+        with conn:
+            for decision in decisions:
+                suggestion = SqliteBackend._get_suggestion(conn, decision["id"])
+                if suggestion is None:
+                    continue
+                cur = conn.execute(
+                    "UPDATE suggestions SET status = ?, resolved_at = ? WHERE id = ? AND status = 'pending'",
+                    (decision["status"], now, decision["id"])
+                )
+                if not cur.rowcount:
+                    continue
+                resolved.append(suggestion)
+                question = decision.get("question")
+                if question:
+                    category, entry = question
+                    text_key = "dare" if "dare" in entry else "question"
+                    conn.execute(
+                        "INSERT INTO questions (category, rating, qid, text_key, text) VALUES (?, ?, ?, ?, ?)",
+                        (category, entry.get("rating", ""), entry["id"], text_key, entry[text_key])
+                    )
+                    inserted = True
+            questions_version = _bump(conn, "questions") if inserted else None
+        return resolved, questions_version
+
+    # Guild config
+
+    @staticmethod
+    def _load_config(conn):
+        return {
+            row["guild_id"]: _guild_entry(row)
+            for row in conn.execute("SELECT guild_id, main_id, nsfw_id, packs FROM guild_config")
+        }
+
+    @staticmethod
+    def _set_guild_config(conn, guild_id, main_id, nsfw_id, packs=None):
+        with conn:
+            # Packs left out (None) keep whatever the guild already plays with
+            conn.execute(
+                "INSERT INTO guild_config (guild_id, main_id, nsfw_id, packs) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(guild_id) DO UPDATE SET main_id = excluded.main_id, nsfw_id = excluded.nsfw_id, "
+                "packs = COALESCE(excluded.packs, guild_config.packs)",
+                (str(guild_id), main_id, nsfw_id, ",".join(packs) if packs else None)
+            )
+            return _bump(conn, "config")
+
+    # Change tracking
+
+    @staticmethod
+    def _change_versions(conn):
+        return {row["name"]: row["version"] for row in conn.execute("SELECT name, version FROM changes")}
+
+    async def change_versions(self):
+        return await self.run(self._change_versions)
+
+    def load_config_sync(self):
+        return self.run_sync(self._load_config)
+
+    async def load_config(self):
+        return await self.run(self._load_config)
+
+    async def set_guild_config(self, guild_id, main_id, nsfw_id=None, packs=None):
+        self.written["config"] = await self.run(self._set_guild_config, guild_id, main_id, nsfw_id, packs)
+
+class ChangeWatcher:
+    """
+    Polls the changes table and calls the callbacks registered for a name
+    when another process (or this one) has written to that data.
+    """
+
+    def __init__(self, backend, interval=CHANGE_POLL_INTERVAL):
+        self.backend = backend
+        self.interval = interval
+        # name -> list of async callbacks
+        self._callbacks = {}
+        self._versions = None
+        self._task = None
+
+    def on(self, name, callback):
+        self._callbacks.setdefault(name, []).append(callback)
+
+    async def start(self):
+        if self._task is None or self._task.done():
+            self._versions = await self.backend.change_versions()
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                versions = await self.backend.change_versions()
+            except sqlite3.Error as e:
+                print(f"Could not poll for database changes: {e}")
+                continue
+            changed = []
+            for name, version in versions.items():
+                seen = self._versions.get(name, 0)
+                # Skip changes that are exactly this process's own last write
+                if version != seen and not (version == seen + 1 and self.backend.written.get(name) == version):
+                    changed.append(name)
+            self._versions = versions
+            for name in changed:
+                for callback in self._callbacks.get(name, ()):
+                    try:
+                        await callback()
+                    except Exception as e:
+                        print(f"Error reloading {name} after a database change: {e}")
+
+class SqliteSuggestions:
+    """
+    Pending suggestions stored in the suggestions table. Same interface as
+    utils.suggestion_manager.SuggestionLog.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    async def load(self):
+        pass
+
+    async def pending(self):
+        return await self.backend.run(self.backend._pending_suggestions)
+
+    async def pending_count(self):
+        return await self.backend.run(self.backend._count_pending)
+
+    async def get(self, suggestion_id):
+        return await self.backend.run(self.backend._get_suggestion, suggestion_id)
+
+    async def add(self, text, type_str, rating, user_id, username):
+        suggestion = {
+            "text": text,
+            "type": type_str.lower(),
+            "rating": rating.lower(),
+            "user_id": user_id,
+            "username": username
+        }
+        suggestion["id"] = await self.backend.run(self.backend._add_suggestion, suggestion)
+        return suggestion
+
+    async def resolve(self, suggestion_id, status):
+        resolved = await self.resolve_many([{"id": suggestion_id, "status": status}])
+        return resolved[0] if resolved else None
+
+    async def resolve_many(self, decisions):
+        """
+        Like SuggestionLog.resolve_many, in one transaction. A decision may
+        also carry "question": (category, entry) to insert in that same
+        transaction when its suggestion is resolved.
+        """
+        resolved, questions_version = await self.backend.run(self.backend._resolve_suggestions, decisions)
+        if questions_version is not None:
+            self.backend.written["questions"] = questions_version
+        return resolved
+
+_backend = None
+
+def get_backend():
+    """
+    Returns the shared SqliteBackend when TICKLE_STORAGE=sqlite, otherwise None.
+    """
+    global _backend
+    if STORAGE_BACKEND != "sqlite":
+        return None
+    if _backend is None:
+        _backend = SqliteBackend()
+    return _backend
+
+# Import / export
+
+def import_json(db_path, questions_path, config_path, suggestions_path, delta_path=None):
+    """
+    Replaces the database contents with the JSON files' contents. Question
+    edits still in `delta_path` (see utils.question_loader.QuestionJournal)
+    are applied on top, as the bot does at startup.
+    """
+    from utils.question_loader import CATEGORIES, load_store_sync
+
+    backend = SqliteBackend(db_path)
+    conn = backend._connect()
+    if delta_path and os.path.exists(delta_path):
+        questions = load_store_sync(questions_path, None, delta_path).snapshot().to_json()
+    else:
+        questions = read_json_sync(questions_path, default={}) or {}
+    config = read_json_sync(config_path, default={}) or {}
+    records, _ = read_lines_sync(suggestions_path)
+
+    with conn:
+        conn.execute("DELETE FROM questions")
+        conn.execute("DELETE FROM guild_config")
+        conn.execute("DELETE FROM suggestions")
+
+        for category in CATEGORIES:
+            # Insert bucket by bucket so each (category, rating) is a contiguous rowid run
+            items = sorted(questions.get(category, []), key=lambda q: q.get("rating", ""))
+            for q in items:
+                text_key = "dare" if "dare" in q else "question"
+                conn.execute(
+                    "INSERT OR IGNORE INTO questions (category, rating, qid, text_key, text) VALUES (?, ?, ?, ?, ?)",
+                    (category, q.get("rating", "").lower(), str(q.get("id")), text_key, q.get(text_key, ""))
+                )
+
+        for guild_id, val in config.items():
+            if isinstance(val, int):
+                val = {"main": val, "nsfw": None}
+            packs = val.get("packs")
+            conn.execute(
+                "INSERT INTO guild_config (guild_id, main_id, nsfw_id, packs) VALUES (?, ?, ?, ?)",
+                (str(guild_id), val.get("main"), val.get("nsfw"), ",".join(packs) if packs else None)
+            )
+
+        pending = {}
+        for record in records:
+            if record.get("op") == "add":
+                pending[record["id"]] = record
+            elif record.get("op") == "resolve":
+                pending.pop(record.get("id"), None)
+        for sg in pending.values():
+            conn.execute(
+                "INSERT INTO suggestions (id, text, type, rating, user_id, username) VALUES (?, ?, ?, ?, ?, ?)",
+                (sg["id"], sg["text"], sg["type"], sg["rating"], sg.get("user_id"), sg.get("username"))
+            )
+
+        _bump(conn, "questions")
+        _bump(conn, "config")
+
+    counts = {
+        table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        for table in ("questions", "guild_config", "suggestions")
+    }
+    print(f"Imported into {db_path}: {counts}")
+
+def export_json(db_path, questions_path, config_path, suggestions_path):
+    """
+    Writes the database contents back out in the JSON file formats.
+    """
+    from utils.question_loader import CATEGORIES
+
+    backend = SqliteBackend(db_path)
+    conn = backend._connect()
+
+    questions = {category: [] for category in CATEGORIES}
+    for row in conn.execute("SELECT category, rating, qid, text_key, text FROM questions ORDER BY rowid"):
+        questions.setdefault(row["category"], []).append({
+            "id": row["qid"],
+            row["text_key"]: row["text"],
+            "rating": row["rating"]
+        })
+    write_json_sync(questions_path, questions, indent=2)
+    write_json_sync(config_path, SqliteBackend._load_config(conn), indent=4)
+
+    pending = SqliteBackend._pending_suggestions(conn)
+    next_id = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM suggestions").fetchone()[0]
+    write_lines_sync(suggestions_path, [{"op": "meta", "next_id": next_id}] + [dict(sg, op="add") for sg in pending])
+    print(f"Exported {db_path} to {questions_path}, {config_path}, {suggestions_path}")
+
+def main():
+    from utils.question_loader import QUESTIONS_FILE, QUESTIONS_DELTA_FILE
+    from utils.server_config import CONFIG_FILE
+    from utils.suggestion_manager import SUGGESTIONS_LOG
+
+    parser = argparse.ArgumentParser(description="Move bot data between the JSON files and SQLite.")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("--db", default=DATABASE_FILE)
+    parser.add_argument("--questions", default=QUESTIONS_FILE)
+    parser.add_argument("--config", default=CONFIG_FILE)
+    parser.add_argument("--suggestions", default=SUGGESTIONS_LOG)
+    parser.add_argument("--delta", default=QUESTIONS_DELTA_FILE,
+                        help="question edit log to apply on import")
+    args = parser.parse_args()
+
+    if args.action == "import":
+        import_json(args.db, args.questions, args.config, args.suggestions, args.delta)
+    else:
+        export_json(args.db, args.questions, args.config, args.suggestions)
+
+if __name__ == "__main__":
+    main()
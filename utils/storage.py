@@ -0,0 +1,230 @@
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from utils.metrics import metrics
+
+# Blocking file work runs here so it never stalls the event loop
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="tickle-io")
+
+# path -> asyncio.Lock, so writes to the same file never interleave
+_locks = {}
+
+# "json" (default) keeps state in the JSON files; "sqlite" uses utils.sqlite_backend
+STORAGE_BACKEND = os.environ.get("TICKLE_STORAGE", "json").lower()
+
+# How long mutations are collected before a scheduled flush hits disk
+FLUSH_DELAY = 1.0
+
+def get_lock(path):
+    """
+    Returns the lock guarding a file, creating it on first use.
+    """
+    key = os.path.abspath(path)
+    lock = _locks.get(key)
+    if lock is None:
+        lock = _locks[key] = asyncio.Lock()
+    return lock
+
+async def run_io(func, *args, **kwargs):
+    """
+    Runs a blocking function on the I/O thread pool and awaits its result.
+    The time taken, including any wait for a free thread, is recorded per
+    function in tickle_io_seconds.
+    """
+    loop = asyncio.get_running_loop()
+    histogram = metrics.histogram(
+        "tickle_io_seconds", "Blocking I/O run on the thread pool, by function",
+        op=getattr(func, "__name__", type(func).__name__)
+    )
+    started = time.perf_counter()
+    try:
+        return await loop.run_in_executor(_executor, partial(func, *args, **kwargs))
+    finally:
+        histogram.observe(time.perf_counter() - started)
+
+def read_json_sync(path, default=None):
+    """
+    Reads a JSON file, returning `default` if it does not exist.
+    Decode errors are raised to the caller.
+    """
+    if not os.path.exists(path):
+        return default
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def write_json_sync(path, data, indent=4):
+    """
+    Writes a JSON file crash-safely: the data goes to a temp file which is
+    fsynced and then renamed over the target, so the file on disk is always
+    either the old or the new version, never a truncated mix.
+
+    `data` may also be an object with a to_json() method, which is called
+    here (on the writer thread) to produce the data.
+    """
+    if hasattr(data, "to_json"):
+        data = data.to_json()
+    _write_atomic(path, lambda f: json.dump(data, f, indent=indent))
+
+def write_lines_sync(path, lines):
+    """
+    Atomically replaces a JSON-lines file with the given records.
+    """
+    def write(f):
+        for record in lines:
+            f.write(json.dumps(record, separators=(',', ':')))
+            f.write('\n')
+    _write_atomic(path, write)
+
+def append_lines_sync(path, records):
+    """
+    Appends records to a JSON-lines file and fsyncs it.
+    """
+    directory = os.path.dirname(path) or '.'
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+    payload = ''.join(json.dumps(r, separators=(',', ':')) + '\n' for r in records)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+
+def read_lines_sync(path):
+    """
+    Reads a JSON-lines file, skipping lines that don't decode (such as a
+    record cut short by a crash mid-append).
+
+    Returns:
+        tuple: (list of records, number of lines skipped).
+    """
+    records = []
+    skipped = 0
+    if not os.path.exists(path):
+        return records, skipped
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                print(f"Skipping unreadable record at {path}:{line_no}")
+                skipped += 1
+    return records, skipped
+
+def _write_atomic(path, write):
+    directory = os.path.dirname(path) or '.'
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _fsync_dir(directory)
+
+def _fsync_dir(directory):
+    # Persist the rename itself; not supported on every platform
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def read_json_or_quarantine(path, default=None):
+    """
+    Like read_json_sync, but a corrupt file is moved aside (kept for manual
+    recovery) instead of being silently overwritten by the next save.
+    """
+    try:
+        return read_json_sync(path, default)
+    except ValueError as e:
+        backup = f"{path}.corrupt-{int(time.time())}"
+        print(f"Error: {path} is corrupt ({e}); moved it to {backup}")
+        os.replace(path, backup)
+        return default
+
+class FlushScheduler:
+    """
+    Coalesces writes: any number of mutations to a file within FLUSH_DELAY
+    seconds become a single flush of its latest state.
+    """
+
+    def __init__(self, delay=FLUSH_DELAY):
+        self.delay = delay
+        # path -> (snapshot callable, indent)
+        self._dirty = {}
+        # path -> pending flush task
+        self._tasks = {}
+
+    def schedule(self, path, snapshot, indent=4):
+        """
+        Marks `path` dirty. `snapshot` is called on the event loop right before
+        writing and must return data that is safe to serialize from a thread.
+
+        Returns:
+            asyncio.Task: The pending flush. It finishes once this change
+            (or a newer one) is on disk; await it to wait for durability.
+        """
+        self._dirty[path] = (snapshot, indent)
+        task = self._tasks.get(path)
+        if task is None or task.done():
+            task = self._tasks[path] = asyncio.create_task(self._flush_later(path))
+        return task
+
+    async def _flush_later(self, path):
+        await asyncio.sleep(self.delay)
+        # A change scheduled while a write is running was handed this same
+        # task, so keep going until nothing newer is pending
+        while path in self._dirty:
+            try:
+                await self.flush(path)
+            except Exception:
+                return # Already reported by flush(); the next schedule() retries
+
+    async def flush(self, path):
+        """
+        Writes the latest state of `path` now if it has pending changes.
+        """
+        async with get_lock(path):
+            entry = self._dirty.pop(path, None)
+            if entry is None:
+                return
+            snapshot, indent = entry
+            try:
+                await run_io(write_json_sync, path, snapshot(), indent)
+            except Exception as e:
+                print(f"Error writing {path}: {e}")
+                # Keep it dirty so the next flush retries, unless newer changes took its place
+                self._dirty.setdefault(path, entry)
+                raise
+
+    async def flush_all(self):
+        for path in list(self._dirty):
+            try:
+                await self.flush(path)
+            except Exception:
+                pass
+
+flusher = FlushScheduler()
+
+def schedule_write(path, snapshot, indent=4):
+    """
+    Schedules a coalesced, atomic write of `path`. See FlushScheduler.schedule.
+    """
+    return flusher.schedule(path, snapshot, indent)
@@ -1,84 +1,188 @@
-import json
 import os
-import aiofiles
-
-SUGGESTIONS_FILE = 'data/suggestions.json'
-QUESTIONS_FILE = 'questions.json'
-
-def ensure_suggestions_file():
-    if not os.path.exists('data'):
-        os.makedirs('data')
-    if not os.path.exists(SUGGESTIONS_FILE):
-        with open(SUGGESTIONS_FILE, 'w') as f:
-            json.dump([], f)
-
-def get_suggestions():
-    ensure_suggestions_file()
-    try:
-        with open(SUGGESTIONS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except (json.JSONDecodeError, IOError):
-        return []
-
-def save_suggestions(suggestions):
-    ensure_suggestions_file()
-    with open(SUGGESTIONS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(suggestions, f, indent=4)
-
-def add_suggestion(text, type_str, rating, user_id, username):
-    suggestions = get_suggestions()
-    suggestion = {
-        "text": text,
-        "type": type_str.lower(),
-        "rating": rating.lower(),
-        "user_id": user_id,
-        "username": username,
-        "id": len(suggestions) + 1  # Simple ID assignment
-    }
-    suggestions.append(suggestion)
-    save_suggestions(suggestions)
-    return suggestion
-
-def remove_suggestion(index):
-    suggestions = get_suggestions()
-    if 0 <= index < len(suggestions):
-        removed = suggestions.pop(index)
-        save_suggestions(suggestions)
-        return removed
-    return None
-
-def approve_suggestion_to_main(suggestion, final_rating):
-    # Load main questions
-    try:
-        with open(QUESTIONS_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-    except Exception as e:
-        print(f"Error loading questions: {e}")
-        return False
-
-    category = "truths" if suggestion['type'] == 'truth' else "dares"
-    
-    # Calculate new ID
-    current_ids = [item['id'] for item in data.get(category, [])]
-    new_id = max(current_ids) + 1 if current_ids else 1
-    
-    new_entry = {
-        "id": new_id,
-        "rating": final_rating,
-        # Use the correct key based on type
-        "question" if category == "truths" else "dare": suggestion['text']
-    }
-    
-    if category not in data:
-        data[category] = []
-        
-    data[category].append(new_entry)
-    
-    # Save back to questions.json
-    try:
-        with open(QUESTIONS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2)
-        return True
-    except Exception as e:
-        print(f"Error saving questions: {e}")
-        return False
+from utils.storage import (
+    get_lock, run_io, read_json_or_quarantine,
+    read_lines_sync, write_lines_sync, append_lines_sync
+)
+
+SUGGESTIONS_LOG = 'data/suggestions.jsonl'
+LEGACY_SUGGESTIONS_FILE = 'data/suggestions.json'
+
+# Compact once this many records no longer describe a pending suggestion
+COMPACT_THRESHOLD = 200
+
+class SuggestionLog:
+    """
+    Pending suggestions backed by an append-only JSON-lines log.
+
+    Each line is one record:
+        {"op": "add", "id": 7, "text": ..., "type": ..., ...}
+        {"op": "resolve", "id": 7, "status": "approved" | "denied"}
+        {"op": "meta", "next_id": 8}
+
+    Submitting appends a single line; approving or denying appends a tombstone.
+    IDs only ever increase, and compaction rewrites the log with just the
+    pending suggestions once enough dead records pile up. Since an ID is never
+    reused, a decision made on a stale screen finds its suggestion gone
+    instead of resolving another one.
+    """
+
+    def __init__(self, path=SUGGESTIONS_LOG, legacy_path=LEGACY_SUGGESTIONS_FILE):
+        self.path = path
+        self.legacy_path = legacy_path
+        # id -> suggestion, in submission order
+        self._pending = None
+        self._next_id = 1
+        self._dead = 0
+
+    async def load(self):
+        """
+        Loads the log into memory on first use, migrating the old
+        suggestions.json if the log doesn't exist yet.
+        """
+        if self._pending is not None:
+            return
+        async with get_lock(self.path):
+            if self._pending is None:
+                await run_io(self._load_sync)
+
+    def _load_sync(self):
+        if not os.path.exists(self.path) and os.path.exists(self.legacy_path):
+            self._migrate_legacy()
+
+        records, skipped = read_lines_sync(self.path)
+        pending = {}
+        next_id = 1
+        dead = skipped
+        for record in records:
+            op = record.get("op")
+            sid = record.get("id")
+            if op == "add":
+                pending[sid] = {k: v for k, v in record.items() if k != "op"}
+                next_id = max(next_id, sid + 1)
+            elif op == "resolve":
+                pending.pop(sid, None)
+                dead += 2
+            elif op == "meta":
+                next_id = max(next_id, record.get("next_id", 1))
+                dead += 1
+
+        self._pending = pending
+        self._next_id = next_id
+        self._dead = dead
+        # A damaged line could swallow the next append, so rewrite right away
+        if skipped or dead > COMPACT_THRESHOLD:
+            self._compact_sync()
+
+    def _migrate_legacy(self):
+        legacy = read_json_or_quarantine(self.legacy_path, default=[]) or []
+        # Old IDs were len()+1 and could repeat, so renumber in order
+        records = []
+        for i, sg in enumerate(legacy, 1):
+            records.append(dict(sg, op="add", id=i))
+        records.append({"op": "meta", "next_id": len(legacy) + 1})
+        write_lines_sync(self.path, records)
+        os.replace(self.legacy_path, self.legacy_path + '.migrated')
+        print(f"Migrated {len(legacy)} suggestion(s) to {self.path}")
+
+    def _compact_sync(self):
+        records = [{"op": "meta", "next_id": self._next_id}]
+        records.extend(dict(sg, op="add") for sg in self._pending.values())
+        write_lines_sync(self.path, records)
+        self._dead = 1
+
+    async def _append(self, records):
+        async with get_lock(self.path):
+            await run_io(append_lines_sync, self.path, records)
+            self._dead += sum(2 for r in records if r["op"] == "resolve")
+            if self._dead > COMPACT_THRESHOLD and self._dead > len(self._pending):
+                await run_io(self._compact_sync)
+
+    async def pending(self):
+        """
+        Returns the pending suggestions as a list, oldest first.
+        """
+        await self.load()
+        return list(self._pending.values())
+
+    async def pending_count(self):
+        await self.load()
+        return len(self._pending)
+
+    async def get(self, suggestion_id):
+        await self.load()
+        return self._pending.get(suggestion_id)
+
+    async def add(self, text, type_str, rating, user_id, username):
+        await self.load()
+        suggestion = {
+            "id": self._next_id,
+            "text": text,
+            "type": type_str.lower(),
+            "rating": rating.lower(),
+            "user_id": user_id,
+            "username": username
+        }
+        self._next_id += 1
+        self._pending[suggestion["id"]] = suggestion
+        await self._append([dict(suggestion, op="add")])
+        return suggestion
+
+    async def resolve(self, suggestion_id, status):
+        """
+        Removes a pending suggestion, recording how it was resolved.
+
+        Returns:
+            dict: The suggestion, or None if it was not pending.
+        """
+        resolved = await self.resolve_many([{"id": suggestion_id, "status": status}])
+        return resolved[0] if resolved else None
+
+    async def resolve_many(self, decisions):
+        """
+        Resolves several suggestions with a single append.
+
+        Args:
+            decisions (list): Dicts with "id" and "status"; other keys are
+                ignored.
+
+        Returns:
+            list: The suggestions that were resolved, in decision order.
+            Decisions whose suggestion is no longer pending are skipped.
+        """
+        await self.load()
+        resolved = []
+        records = []
+        for decision in decisions:
+            suggestion = self._pending.get(decision["id"])
+            if suggestion is None:
+                continue
+            del self._pending[decision["id"]]
+            resolved.append(suggestion)
+            records.append({"op": "resolve", "id": decision["id"], "status": decision["status"]})
+        if records:
+            await self._append(records)
+        return resolved
+
+def _make_suggestion_store():
+    from utils.sqlite_backend import get_backend, SqliteSuggestions
+    backend = get_backend()
+    if backend:
+        return SqliteSuggestions(backend)
+    return SuggestionLog()
+
+suggestion_log = _make_suggestion_store()
+
+async def get_suggestions():
+    return await suggestion_log.pending()
+
+async def count_suggestions():
+    return await suggestion_log.pending_count()
+
+async def add_suggestion(text, type_str, rating, user_id, username):
+    return await suggestion_log.add(text, type_str, rating, user_id, username)
+
+async def approve_suggestion(suggestion_id):
+    return await suggestion_log.resolve(suggestion_id, "approved")
+
+async def deny_suggestion(suggestion_id):
+    return await suggestion_log.resolve(suggestion_id, "denied")